@@ -1,9 +1,19 @@
 import os
 from flask import Flask
 from flask_cors import CORS
-from sqlalchemy import text
 # Pastikan Anda sudah mengimport 'db' dan 'init_db' dari models
-from backend.models import db, init_db 
+from backend.models import db, init_db, reset_schema, check_schema
+from backend.utils.cache import configure_cache
+from backend.utils.query_budget import init_query_budget
+from backend.utils.db_pool import engine_options_from_env, init_pool
+from backend.utils.jobs import init_upload_jobs
+from backend.utils.deletion import init_delete_jobs
+from backend.utils.uploads import StagedUploadRequest
+from backend.utils.storage import init_storage
+from backend.utils.assets import init_assets
+from backend.utils.http_cache import init_http_cache
+from backend.utils.fragment_cache import init_fragment_cache
+from backend.utils.templates import init_template_cache
 
 def create_app(reset_db=False):
     """
@@ -18,6 +28,8 @@ def create_app(reset_db=False):
         template_folder=os.path.join(FRONTEND_DIR, 'templates'),
         static_folder=os.path.join(FRONTEND_DIR, 'static')
     )
+    # File PDF dari add_lesson dialirkan langsung ke UPLOAD_FOLDER/jobs (lihat utils/uploads.py)
+    app.request_class = StagedUploadRequest
 
     # Konfigurasi dasar
     # Mengambil kunci rahasia dari Environment Variables Render
@@ -39,11 +51,29 @@ def create_app(reset_db=False):
 
     
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Pool koneksi (ukuran, recycle, pre-ping, statement timeout, mode PgBouncer) dari env
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env(app.config['SQLALCHEMY_DATABASE_URI'])
     # -------------------------------------------------------------
 
+    # Backend bersama untuk cache konten (opsional): redis://... atau local://
+    app.config['CACHE_URL'] = os.environ.get('CACHE_URL')
+
+    # Batas jumlah query per request untuk blueprint profile/auth/admin (0 = nonaktif)
+    app.config['QUERY_BUDGET'] = int(os.environ.get('QUERY_BUDGET', 0))
+    app.config['QUERY_BUDGET_STRICT'] = os.environ.get('QUERY_BUDGET_STRICT') == '1'
+
+    # Jalankan migrasi otomatis saat boot jika skema tertinggal (development / tanpa langkah release)
+    app.config['AUTO_MIGRATE'] = os.environ.get('AUTO_MIGRATE') == '1'
+
+    # Hapus modul/pelajaran dengan lebih dari sekian baris jawaban+progress secara bertahap
+    app.config['BULK_DELETE_THRESHOLD'] = int(os.environ.get('BULK_DELETE_THRESHOLD', 20000))
+
     # Inisialisasi database dan CORS
     db.init_app(app)
     CORS(app)
+    with app.app_context():
+        init_pool(db.engine)
 
     # Folder upload
     UPLOAD_FOLDER = os.path.join(BASE_DIR, '..', 'uploads')
@@ -51,6 +81,37 @@ def create_app(reset_db=False):
     app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
     app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB
 
+    # Upload PDF ke Google Drive dijalankan oleh job di latar belakang (UPLOAD_FAKE_DRIVE=1 untuk development)
+    app.config['UPLOAD_WORKERS'] = int(os.environ.get('UPLOAD_WORKERS', 2))
+    app.config['UPLOAD_FAKE_DRIVE'] = os.environ.get('UPLOAD_FAKE_DRIVE') == '1'
+    # Nama host staging (file sementara ada di disk lokal); kosong = hostname mesin/container
+    app.config['UPLOAD_STAGING_HOST'] = os.environ.get('UPLOAD_STAGING_HOST')
+
+    # Penyimpanan PDF pelajaran: 'drive' (default) atau 'local' (UPLOAD_FOLDER harus persisten)
+    app.config['PDF_STORAGE'] = os.environ.get('PDF_STORAGE', 'drive')
+    # Serahkan pengiriman file ke reverse proxy (X-Sendfile) jika tersedia
+    app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+
+    # Aset statis ber-hash di frontend/static/dist (dibangun oleh `flask build-assets`)
+    app.config['ASSETS_BUILD_ON_START'] = os.environ.get('ASSETS_BUILD_ON_START') == '1'
+
+    # Berapa lama (detik) setiap worker memakai versi konten yang diingatnya sebelum membaca ulang
+    app.config['CONTENT_VERSION_TTL'] = float(os.environ.get('CONTENT_VERSION_TTL', 1.0))
+
+    # Kompresi gzip/brotli untuk HTML/JSON (HTTP_COMPRESS=0 jika reverse proxy sudah mengompresi)
+    app.config['HTTP_COMPRESS'] = os.environ.get('HTTP_COMPRESS', '1') == '1'
+    app.config['HTTP_COMPRESS_MIN_SIZE'] = int(os.environ.get('HTTP_COMPRESS_MIN_SIZE', 1024))
+
+    # Cache fragmen template {% cache %} (FRAGMENT_CACHE=0 saat sedang mengedit template)
+    app.config['FRAGMENT_CACHE'] = os.environ.get('FRAGMENT_CACHE', '1') == '1'
+
+    # Bytecode template Jinja di disk (diisi `flask templates precompile`), kosongkan untuk menonaktifkan
+    app.config['TEMPLATE_CACHE_DIR'] = os.environ.get(
+        'TEMPLATE_CACHE_DIR', os.path.join(FRONTEND_DIR, '.jinja_cache')
+    )
+    # Muat semua template saat worker start, bukan saat request pertama
+    app.config['TEMPLATES_PRELOAD'] = os.environ.get('TEMPLATES_PRELOAD') == '1'
+
     # Register blueprints
     from backend.routes.main import main_bp
     from backend.routes.auth import auth_bp
@@ -62,23 +123,35 @@ def create_app(reset_db=False):
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(profile_bp, url_prefix='/profile')
 
-    # Inisialisasi database + seed data
+    # Perintah CLI (flask recompute-progress, dll.)
+    from backend.commands import register_commands
+    register_commands(app)
+
+    # Cache dikonfigurasi setelah blueprint diimport agar semua instance cache sudah terdaftar
+    configure_cache(app)
+    init_query_budget(app)
+    init_upload_jobs(app)
+    init_delete_jobs(app)
+    init_storage(app)
+    init_assets(app)
+    init_http_cache(app)
+    init_fragment_cache(app)
+    init_template_cache(app)
+
+    # Skema dan data awal dibuat oleh `flask init-db` (langkah release/deploy), bukan oleh
+    # setiap worker. Saat boot hanya versi skema yang diperiksa (satu query).
     with app.app_context():
         # Bagian ini HANYA berjalan jika reset_db=True dilewatkan
         if reset_db:
-            print("⚠️ Menghapus schema public (development only)...")
             try:
                 # Menghapus dan membuat ulang skema untuk reset data
-                db.session.execute(text('DROP SCHEMA public CASCADE;'))
-                db.session.execute(text('CREATE SCHEMA public;'))
-                db.session.commit()
+                reset_schema()
             except Exception as e:
                 print(f"Gagal reset schema: {e}")
                 db.session.rollback()
-
-        # Buat tabel (jika belum ada) dan isi data awal (seed data)
-        # init_db() akan membuat tabel JIKA BELUM ADA.
-        init_db(app)
+            init_db(app)
+        else:
+            check_schema(app)
 
     return app
 
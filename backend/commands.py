@@ -0,0 +1,198 @@
+import os
+import click
+from sqlalchemy import text
+from backend.models import db, init_db, reset_schema, current_schema_version, LATEST_SCHEMA_VERSION
+from backend.utils.assets import build_assets
+from backend.utils.deletion import CHUNK_SIZE, delete_in_chunks
+from backend.utils.load_test import lesson_request, mcq_request, run_load_test
+from backend.utils.import_time import DEFAULT_BUDGET_MS, measure_import, eager_heavy_modules
+from backend.utils.importer import IMPORT_FORMATS, iter_import_rows, import_questions
+from backend.utils.progress import recompute_progress, verify_lesson_progress
+from backend.utils.query_plans import find_full_scans
+from backend.utils.templates import load_templates
+
+
+def register_commands(app):
+    """Mendaftarkan perintah CLI `flask ...` untuk pemeliharaan data."""
+
+    @app.cli.command('init-db')
+    @click.option('--reset', is_flag=True, help='Hapus seluruh schema public terlebih dahulu (development only).')
+    @click.option('--no-seed', is_flag=True, help='Jangan isi data awal (admin + modul contoh).')
+    def init_db_command(reset, no_seed):
+        """Membuat tabel, mengisi data awal, dan menjalankan migrasi skema (idempotent)."""
+        if reset:
+            reset_schema()
+        init_db(app, seed=not no_seed)
+        print(f"✅ Skema database versi {current_schema_version()} (terbaru: {LATEST_SCHEMA_VERSION}).")
+
+    @app.cli.command('recompute-progress')
+    @click.option('--lesson-id', type=int, default=None, help='Batasi ke satu pelajaran.')
+    @click.option('--verify', is_flag=True, help='Hanya bandingkan, jangan tulis perubahan.')
+    def recompute_progress_command(lesson_id, verify):
+        """Menghitung ulang tabel progress dari tabel jawaban (mode penuh)."""
+        if verify:
+            query = "SELECT user_id, lesson_id FROM progress"
+            if lesson_id is not None:
+                query += " WHERE lesson_id = :lid"
+
+            with db.engine.connect() as conn:
+                rows = conn.execute(text(query), {"lid": lesson_id}).all()
+                mismatches = [
+                    m for m in (verify_lesson_progress(conn, r.user_id, r.lesson_id) for r in rows) if m
+                ]
+
+            for m in mismatches:
+                print(f"❌ user={m['user_id']} lesson={m['lesson_id']} "
+                      f"tersimpan={m['stored']} seharusnya={m['expected']}")
+            print(f"✅ {len(rows)} baris diperiksa, {len(mismatches)} tidak cocok.")
+            return
+
+        with db.engine.begin() as conn:
+            updated = recompute_progress(conn, lesson_id)
+        print(f"✅ {updated} baris progress dihitung ulang.")
+
+    @app.cli.command('check-query-plans')
+    @click.option('--seed/--no-seed', default=True,
+                  help='Isi data contoh berukuran realistis dulu (selalu di-rollback).')
+    @click.option('--users', type=int, default=10000, show_default=True,
+                  help='Jumlah user data contoh.')
+    def check_query_plans_command(seed, users):
+        """Gagal (exit code 1) jika ada query utama yang memindai seluruh tabel."""
+        with db.engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                failures = find_full_scans(conn, seed, users)
+            finally:
+                trans.rollback()
+
+        for name, tables in failures.items():
+            print(f"❌ {name}: scan penuh pada {', '.join(tables)}")
+        if failures:
+            raise SystemExit(1)
+        print("✅ Semua query utama memakai index.")
+
+    @app.cli.command('import-questions')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None,
+                  help='Format file (default: dari ekstensi file).')
+    def import_questions_command(path, fmt):
+        """Import soal isian singkat dan pilihan ganda dari file CSV/JSON."""
+        if fmt is None:
+            fmt = 'csv' if path.lower().endswith('.csv') else 'json'
+
+        with open(path, 'rb') as f:
+            report = import_questions(db.engine, iter_import_rows(f, fmt))
+
+        for err in report['errors']:
+            where = f"baris {err['row']}: " if err['row'] is not None else ''
+            print(f"❌ {where}{err['error']}")
+        print(f"✅ {report['inserted']['short']} soal isian dan {report['inserted']['mcq']} soal pilihan ganda "
+              f"diimport ke {len(report['lessons'])} pelajaran, {len(report['errors'])} error.")
+        if report['errors']:
+            raise SystemExit(1)
+
+    @app.cli.command('delete-content')
+    @click.option('--module-id', type=int, default=None, help='Hapus satu modul beserta isinya.')
+    @click.option('--lesson-id', type=int, default=None, help='Hapus satu pelajaran beserta isinya.')
+    @click.option('--chunk-size', type=int, default=CHUNK_SIZE, show_default=True,
+                  help='Jumlah baris jawaban/progress per transaksi.')
+    def delete_content_command(module_id, lesson_id, chunk_size):
+        """Menghapus modul atau pelajaran besar secara bertahap (transaksi pendek)."""
+        if (module_id is None) == (lesson_id is None):
+            raise click.UsageError('Isi salah satu dari --module-id atau --lesson-id.')
+
+        lesson_ids = delete_in_chunks(db.engine, module_id=module_id, lesson_id=lesson_id,
+                                      chunk_size=chunk_size)
+        print(f"✅ {len(lesson_ids)} pelajaran dihapus.")
+
+    @app.cli.command('run-upload-jobs')
+    def run_upload_jobs_command():
+        """Memproses semua upload job PDF yang jatuh tempo (tanpa menunggu dispatcher web)."""
+        processed = app.extensions['upload_jobs'].run_pending()
+        print(f"✅ {processed} upload job diproses.")
+
+    @app.cli.command('run-delete-jobs')
+    def run_delete_jobs_command():
+        """Memproses semua delete job yang jatuh tempo (tanpa menunggu dispatcher web)."""
+        processed = app.extensions['delete_jobs'].run_pending()
+        print(f"✅ {processed} delete job diproses.")
+
+    @app.cli.command('check-import-time')
+    @click.option('--budget-ms', type=float, default=None,
+                  help=f'Batas waktu import backend.app (default: IMPORT_TIME_BUDGET_MS atau {DEFAULT_BUDGET_MS}).')
+    @click.option('--top', type=int, default=10, show_default=True, help='Tampilkan N modul paling lambat.')
+    def check_import_time_command(budget_ms, top):
+        """Gagal (exit code 1) jika import backend.app melewati anggaran atau memuat SDK berat."""
+        if budget_ms is None:
+            budget_ms = float(os.environ.get('IMPORT_TIME_BUDGET_MS', DEFAULT_BUDGET_MS))
+
+        total_ms, modules = measure_import('backend.app')
+        for name, ms in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top]:
+            print(f"   {ms:8.1f} ms  {name}")
+
+        failed = False
+        eager = eager_heavy_modules(modules)
+        if eager:
+            print(f"❌ SDK berat ikut diimport saat start: {', '.join(eager)}")
+            failed = True
+        if total_ms > budget_ms:
+            print(f"❌ Import backend.app {total_ms:.0f} ms, melewati anggaran {budget_ms:.0f} ms.")
+            failed = True
+        if failed:
+            raise SystemExit(1)
+        print(f"✅ Import backend.app {total_ms:.0f} ms (anggaran {budget_ms:.0f} ms).")
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Membangun frontend/static/dist: nama file ber-hash, varian gzip/brotli, gambar WebP/AVIF."""
+        manifest = build_assets(app.static_folder)
+        app.extensions['assets'].reload()
+
+        variants = sum(len(v) for v in manifest['variants'].values())
+        encodings = sorted({e for enc in manifest['compressed'].values() for e in enc})
+        print(f"✅ {len(manifest['files'])} file di-hash, {len(manifest['compressed'])} file dikompresi "
+              f"({', '.join(encodings) or '-'}), {variants} gambar turunan.")
+        if not manifest['variants']:
+            print("⚠️ Pillow tidak terpasang: gambar WebP/AVIF tidak dibuat.")
+
+    @app.cli.group('templates')
+    def templates_group():
+        """Perintah untuk template Jinja."""
+
+    @templates_group.command('precompile')
+    @click.option('--clear', is_flag=True, help='Kosongkan bytecode cache lama terlebih dahulu.')
+    def templates_precompile_command(clear):
+        """Mengompilasi semua template ke bytecode cache (TEMPLATE_CACHE_DIR) sebelum worker start."""
+        cache = app.jinja_env.bytecode_cache
+        if cache is None:
+            print("❌ TEMPLATE_CACHE_DIR tidak diatur: bytecode cache template nonaktif.")
+            raise SystemExit(1)
+        if clear:
+            cache.clear()
+
+        timings = load_templates(app)
+        print(f"✅ {len(timings)} template dikompilasi ke {app.config['TEMPLATE_CACHE_DIR']} "
+              f"({sum(timings.values()):.0f} ms).")
+
+    @app.cli.command('load-test')
+    @click.option('--url', default='http://127.0.0.1:8000', show_default=True, help='Alamat server yang diuji.')
+    @click.option('--email', required=True, help='Email user khusus load test.')
+    @click.option('--password', required=True, help='Password user tersebut.')
+    @click.option('--lesson-id', type=int, required=True, help='Pelajaran untuk GET /lessons/<id>.')
+    @click.option('--mcq-id', type=int, default=None, help='Soal pilihan ganda untuk POST /submit_mcq_answer.')
+    @click.option('--concurrency', type=int, default=16, show_default=True, help='Jumlah klien bersamaan.')
+    @click.option('--duration', type=float, default=30.0, show_default=True, help='Lama pengujian (detik).')
+    def load_test_command(url, email, password, lesson_id, mcq_id, concurrency, duration):
+        """Mengukur throughput dan latensi /lessons/<id> dan /submit_mcq_answer pada server yang berjalan."""
+        requests = [lesson_request(lesson_id)]
+        if mcq_id is not None:
+            requests.append(mcq_request(mcq_id))
+
+        report = run_load_test(url, requests, email, password, concurrency=concurrency, duration=duration)
+        for label, r in report.items():
+            print(f"   {label:28} {r['rps']:8.1f} req/s  p50 {r['p50_ms']:7.1f} ms  "
+                  f"p95 {r['p95_ms']:7.1f} ms  p99 {r['p99_ms']:7.1f} ms  ({r['requests']} ok, {r['errors']} gagal)")
+        if any(r['errors'] for r in report.values()):
+            print("❌ Sebagian request gagal.")
+            raise SystemExit(1)
+        print(f"✅ Load test selesai: {concurrency} klien, {duration:.0f} detik.")
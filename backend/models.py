@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
 from werkzeug.security import generate_password_hash
 from datetime import datetime
 
@@ -19,10 +21,10 @@ class User(db.Model):
     password = db.Column(db.String(255), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
 
-    progress = db.relationship('Progress', backref='user', cascade='all, delete-orphan')
-    answers = db.relationship('UserAnswer', backref='user', cascade='all, delete-orphan')
+    progress = db.relationship('Progress', backref='user', cascade='all, delete-orphan', passive_deletes=True)
+    answers = db.relationship('UserAnswer', backref='user', cascade='all, delete-orphan', passive_deletes=True)
     # 🚨 BARU: Relasi untuk Jawaban Pilihan Ganda
-    mcq_answers = db.relationship('MultipleChoiceAnswer', backref='user', cascade='all, delete-orphan')
+    mcq_answers = db.relationship('MultipleChoiceAnswer', backref='user', cascade='all, delete-orphan', passive_deletes=True)
 
     def __repr__(self):
         return f"<User {self.name}>"
@@ -36,8 +38,10 @@ class Module(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
+    # TRUE selama modul dihapus bertahap oleh delete job (disembunyikan dari user)
+    deleting = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
-    lessons = db.relationship('Lesson', backref='module', cascade='all, delete-orphan')
+    lessons = db.relationship('Lesson', backref='module', cascade='all, delete-orphan', passive_deletes=True)
 
     def __repr__(self):
         return f"<Module {self.title}>"
@@ -53,12 +57,19 @@ class Lesson(db.Model):
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text)
     pdf_url = db.Column(db.String(500))
+    # 'ready' = pdf_url siap dipakai, 'pending' = upload masih diproses job, 'failed' = upload gagal
+    pdf_status = db.Column(db.String(20), nullable=False, default='ready', server_default='ready')
+    # TRUE selama pelajaran dihapus bertahap oleh delete job (disembunyikan dari user)
+    deleting = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
-    questions = db.relationship('Question', backref='lesson', cascade='all, delete-orphan')
+    questions = db.relationship('Question', backref='lesson', cascade='all, delete-orphan', passive_deletes=True)
     # 🚨 BARU: Relasi ke Soal Pilihan Ganda
-    mcqs = db.relationship('MultipleChoiceQuestion', backref='lesson', cascade='all, delete-orphan')
+    mcqs = db.relationship('MultipleChoiceQuestion', backref='lesson', cascade='all, delete-orphan', passive_deletes=True)
     
-    progress = db.relationship('Progress', backref='lesson', cascade='all, delete-orphan')
+    progress = db.relationship('Progress', backref='lesson', cascade='all, delete-orphan', passive_deletes=True)
+
+    # Daftar pelajaran per modul (WHERE module_id = ... ORDER BY id)
+    __table_args__ = (db.Index('ix_lessons_module_id_id', 'module_id', 'id'),)
 
     def __repr__(self):
         return f"<Lesson {self.title}>"
@@ -75,7 +86,10 @@ class Question(db.Model):
     answer = db.Column(db.String(255), nullable=False) # Jawaban isian singkat
     points = db.Column(db.Integer, default=10)
 
-    answers = db.relationship('UserAnswer', backref='question', cascade='all, delete-orphan')
+    answers = db.relationship('UserAnswer', backref='question', cascade='all, delete-orphan', passive_deletes=True)
+
+    # Soal per pelajaran (WHERE lesson_id = ... ORDER BY id)
+    __table_args__ = (db.Index('ix_questions_lesson_id_id', 'lesson_id', 'id'),)
 
     def __repr__(self):
         return f"<Question {self.id}>"
@@ -97,7 +111,9 @@ class MultipleChoiceQuestion(db.Model):
     points = db.Column(db.Integer, default=10)
 
     # Relasi dengan Jawaban User
-    answers = db.relationship('MultipleChoiceAnswer', backref='mcq', cascade='all, delete-orphan')
+    answers = db.relationship('MultipleChoiceAnswer', backref='mcq', cascade='all, delete-orphan', passive_deletes=True)
+
+    __table_args__ = (db.Index('ix_multiple_choice_questions_lesson_id_id', 'lesson_id', 'id'),)
 
     def __repr__(self):
         return f"<MCQ {self.id}>"
@@ -115,7 +131,11 @@ class MultipleChoiceAnswer(db.Model):
     is_correct = db.Column(db.Boolean, default=False)
     answered_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    __table_args__ = (db.UniqueConstraint('user_id', 'question_id', name='unique_user_mcq'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'question_id', name='unique_user_mcq'),
+        # Hapus/cascade per soal (unique di atas diawali user_id, jadi tidak terpakai)
+        db.Index('ix_multiple_choice_answers_question_id', 'question_id'),
+    )
 
 
 # ==========================================================
@@ -128,10 +148,19 @@ class Progress(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     lesson_id = db.Column(db.Integer, db.ForeignKey('lessons.id', ondelete='CASCADE'), nullable=False)
     score = db.Column(db.Integer, default=0)
+    # Jumlah soal (isian + pilihan ganda) yang sudah dijawab benar, dipakai oleh progress engine
+    correct_count = db.Column(db.Integer, default=0)
     completed = db.Column(db.Boolean, default=False)
     last_update = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    __table_args__ = (db.UniqueConstraint('user_id', 'lesson_id', name='unique_user_lesson'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'lesson_id', name='unique_user_lesson'),
+        # Hapus/hitung ulang progress per pelajaran
+        db.Index('ix_progress_lesson_id', 'lesson_id'),
+        # Jumlah pelajaran selesai per user (admin users_progress_list)
+        db.Index('ix_progress_user_id_completed', 'user_id', 'lesson_id',
+                 postgresql_where=db.text('completed')),
+    )
 
 # ==========================================================
 # 6️⃣ MODEL USER_ANSWERS (Jawaban Isian Singkat)
@@ -144,7 +173,10 @@ class UserAnswer(db.Model):
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False)
     answered_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    __table_args__ = (db.UniqueConstraint('user_id', 'question_id', name='unique_user_question'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'question_id', name='unique_user_question'),
+        db.Index('ix_user_answers_question_id', 'question_id'),
+    )
 
 # ==========================================================
 # 7️⃣ MODEL KONTAK
@@ -159,12 +191,232 @@ class ContactMessage(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     is_read = db.Column(db.Boolean, default=False) # Status pesan, default belum dibaca
 
+    # Kotak masuk admin: ORDER BY is_read ASC, timestamp DESC + hitung pesan belum dibaca
+    __table_args__ = (db.Index('ix_contact_message_is_read_timestamp', 'is_read', db.text('timestamp DESC')),)
+
     def __repr__(self):
         return f'<ContactMessage {self.email} - Subject: {self.subject}>'
 
 
 # ==========================================================
-# 8️⃣ FUNGSI INISIALISASI DATABASE (seed_data - DIMODIFIKASI)
+# 8️⃣ MODEL LESSON_STATS & MODULE_STATS (Cache total soal dan skor maksimal)
+# ==========================================================
+class LessonStats(db.Model):
+    """Jumlah soal dan skor maksimal per pelajaran, diperbarui setiap kali admin mengubah soal."""
+    __tablename__ = 'lesson_stats'
+
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lessons.id', ondelete='CASCADE'), primary_key=True)
+    question_count = db.Column(db.Integer, nullable=False, default=0)
+    mcq_count = db.Column(db.Integer, nullable=False, default=0)
+    max_score = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ModuleStats(db.Model):
+    """Ringkasan lesson_stats per modul, dibaca oleh halaman katalog /modules."""
+    __tablename__ = 'module_stats'
+
+    module_id = db.Column(db.Integer, db.ForeignKey('modules.id', ondelete='CASCADE'), primary_key=True)
+    lesson_count = db.Column(db.Integer, nullable=False, default=0)
+    question_count = db.Column(db.Integer, nullable=False, default=0)
+    max_score = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ==========================================================
+# 🚨 MODEL BARU: Antrian Upload PDF (UploadJob)
+# ==========================================================
+class UploadJob(db.Model):
+    """Antrian upload PDF pelajaran (diproses di luar request oleh backend/utils/jobs.py)."""
+    __tablename__ = 'upload_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lessons.id', ondelete='CASCADE'), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)  # File sementara di UPLOAD_FOLDER/jobs
+    # Host yang menyimpan file sementara itu (disk lokal); host lain tidak mengambil job ini
+    staged_on = db.Column(db.String(255))
+    filename = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending/running/done/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    progress = db.Column(db.Float, nullable=False, default=0.0)  # 0.0 - 1.0
+    resumable_uri = db.Column(db.Text)  # Sesi upload resumable Drive, untuk melanjutkan setelah restart
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)  # Batas waktu klaim worker (job dianggap macet setelahnya)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Worker mengambil job yang jatuh tempo: WHERE status IN (...) ORDER BY next_attempt_at
+    __table_args__ = (db.Index('ix_upload_jobs_status_next_attempt_at', 'status', 'next_attempt_at'),)
+
+
+# ==========================================================
+# 🚨 MODEL BARU: Antrian Hapus Bertahap (DeleteJob)
+# ==========================================================
+class DeleteJob(db.Model):
+    """Antrian penghapusan modul/pelajaran besar (diproses di luar request oleh backend/utils/deletion.py)."""
+    __tablename__ = 'delete_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Tanpa FOREIGN KEY: baris target memang dihapus oleh job ini, riwayat job tetap disimpan
+    target = db.Column(db.String(10), nullable=False)  # 'module' / 'lesson'
+    target_id = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(200))
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending/running/done/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)  # Batas waktu klaim worker (job dianggap macet setelahnya)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_delete_jobs_status_next_attempt_at', 'status', 'next_attempt_at'),
+        # Paling banyak satu job aktif per target (klik "Hapus" dua kali tidak membuat job kedua)
+        db.Index('ux_delete_jobs_active_target', 'target', 'target_id', unique=True,
+                 postgresql_where=db.text("status IN ('pending', 'running')")),
+    )
+
+
+# ==========================================================
+# 🚨 MODEL BARU: Versi Data Konten (ContentVersion)
+# ==========================================================
+class ContentVersion(db.Model):
+    """Penghitung versi yang dinaikkan setiap kali admin mengubah konten (dipakai ETag halaman)."""
+    __tablename__ = 'content_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ==========================================================
+# 9️⃣ VERSI SKEMA (Migrasi ringan tanpa Alembic)
+# ==========================================================
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_version'
+
+    version = db.Column(db.Integer, primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# Setiap migrasi harus idempotent, karena pada database baru tabel sudah
+# dibuat lengkap oleh db.create_all() sebelum migrasi dijalankan.
+SCHEMA_MIGRATIONS = [
+    (1, [
+        # Kolom correct_count untuk progress engine berbasis delta
+        "ALTER TABLE progress ADD COLUMN IF NOT EXISTS correct_count INTEGER DEFAULT 0",
+        # Isi lesson_stats untuk semua pelajaran yang sudah ada
+        """
+        INSERT INTO lesson_stats (lesson_id, question_count, mcq_count, max_score)
+        SELECT
+            l.id,
+            (SELECT COUNT(*) FROM questions WHERE lesson_id = l.id),
+            (SELECT COUNT(*) FROM multiple_choice_questions WHERE lesson_id = l.id),
+            COALESCE((SELECT SUM(points) FROM questions WHERE lesson_id = l.id), 0) +
+            COALESCE((SELECT SUM(points) FROM multiple_choice_questions WHERE lesson_id = l.id), 0)
+        FROM lessons l
+        ON CONFLICT (lesson_id) DO UPDATE SET
+            question_count = EXCLUDED.question_count,
+            mcq_count = EXCLUDED.mcq_count,
+            max_score = EXCLUDED.max_score
+        """,
+        # Hitung correct_count untuk baris progress lama
+        """
+        UPDATE progress p SET correct_count =
+            (SELECT COUNT(*) FROM user_answers ua
+             JOIN questions q ON ua.question_id = q.id
+             WHERE ua.user_id = p.user_id AND q.lesson_id = p.lesson_id) +
+            (SELECT COUNT(*) FROM multiple_choice_answers mca
+             JOIN multiple_choice_questions mcq ON mca.question_id = mcq.id
+             WHERE mca.user_id = p.user_id AND mcq.lesson_id = p.lesson_id AND mca.is_correct = TRUE)
+        """,
+    ]),
+    (2, [
+        # Isi module_stats dari lesson_stats untuk semua modul yang sudah ada
+        """
+        INSERT INTO module_stats (module_id, lesson_count, question_count, max_score)
+        SELECT
+            m.id,
+            COUNT(l.id),
+            COALESCE(SUM(ls.question_count + ls.mcq_count), 0),
+            COALESCE(SUM(ls.max_score), 0)
+        FROM modules m
+        LEFT JOIN lessons l ON l.module_id = m.id
+        LEFT JOIN lesson_stats ls ON ls.lesson_id = l.id
+        GROUP BY m.id
+        ON CONFLICT (module_id) DO UPDATE SET
+            lesson_count = EXCLUDED.lesson_count,
+            question_count = EXCLUDED.question_count,
+            max_score = EXCLUDED.max_score
+        """,
+    ]),
+    (3, [
+        # Index untuk jalur query utama di routes/main.py dan routes/admin.py
+        # (harus sama dengan deklarasi __table_args__ di model)
+        "CREATE INDEX IF NOT EXISTS ix_lessons_module_id_id ON lessons (module_id, id)",
+        "CREATE INDEX IF NOT EXISTS ix_questions_lesson_id_id ON questions (lesson_id, id)",
+        "CREATE INDEX IF NOT EXISTS ix_multiple_choice_questions_lesson_id_id "
+        "ON multiple_choice_questions (lesson_id, id)",
+        "CREATE INDEX IF NOT EXISTS ix_multiple_choice_answers_question_id ON multiple_choice_answers (question_id)",
+        "CREATE INDEX IF NOT EXISTS ix_user_answers_question_id ON user_answers (question_id)",
+        "CREATE INDEX IF NOT EXISTS ix_progress_lesson_id ON progress (lesson_id)",
+        "CREATE INDEX IF NOT EXISTS ix_progress_user_id_completed ON progress (user_id, lesson_id) WHERE completed",
+        "CREATE INDEX IF NOT EXISTS ix_contact_message_is_read_timestamp "
+        "ON contact_message (is_read, timestamp DESC)",
+    ]),
+    (4, [
+        # Status PDF pelajaran untuk upload di latar belakang (tabel upload_jobs dibuat oleh create_all)
+        "ALTER TABLE lessons ADD COLUMN IF NOT EXISTS pdf_status VARCHAR(20) NOT NULL DEFAULT 'ready'",
+    ]),
+    (5, [
+        # Progres dan sesi upload resumable per job
+        "ALTER TABLE upload_jobs ADD COLUMN IF NOT EXISTS progress FLOAT NOT NULL DEFAULT 0",
+        "ALTER TABLE upload_jobs ADD COLUMN IF NOT EXISTS resumable_uri TEXT",
+    ]),
+    (6, [
+        # Versi konten awal untuk ETag halaman (tabel content_versions dibuat oleh create_all)
+        "INSERT INTO content_versions (name, version, updated_at) "
+        "VALUES ('content', 1, now() AT TIME ZONE 'utc') ON CONFLICT (name) DO NOTHING",
+    ]),
+    (7, [
+        # Penanda hapus bertahap (tabel delete_jobs dibuat oleh create_all)
+        "ALTER TABLE modules ADD COLUMN IF NOT EXISTS deleting BOOLEAN NOT NULL DEFAULT FALSE",
+        "ALTER TABLE lessons ADD COLUMN IF NOT EXISTS deleting BOOLEAN NOT NULL DEFAULT FALSE",
+    ]),
+    (8, [
+        # Host staging upload job (job lama tanpa host boleh diambil host mana pun)
+        "ALTER TABLE upload_jobs ADD COLUMN IF NOT EXISTS staged_on VARCHAR(255)",
+    ]),
+]
+
+
+LATEST_SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+
+def current_schema_version():
+    """Versi skema di database (0 jika tabel schema_version belum ada). Cukup satu query."""
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+    except ProgrammingError:
+        return 0
+
+
+def upgrade_schema():
+    """Menjalankan migrasi di SCHEMA_MIGRATIONS yang belum tercatat di tabel schema_version."""
+    current = db.session.query(db.func.max(SchemaVersion.version)).scalar() or 0
+
+    for version, statements in SCHEMA_MIGRATIONS:
+        if version <= current:
+            continue
+        for statement in statements:
+            db.session.execute(text(statement))
+        db.session.add(SchemaVersion(version=version))
+        db.session.commit()
+        print(f"✅ Migrasi skema versi {version} diterapkan.")
+
+
+# ==========================================================
+# 🔟 FUNGSI INISIALISASI DATABASE (seed_data - DIMODIFIKASI)
 # ==========================================================
 def seed_data():
     """Mengisi data awal (admin + modul dasar) jika belum ada."""
@@ -178,7 +430,8 @@ def seed_data():
         db.session.add(admin)
         db.session.flush()
 
-    if Module.query.count() == 0:
+    # Hanya kolom id: seed berjalan sebelum migrasi, kolom baru mungkin belum ada di database lama
+    if db.session.query(Module.id).first() is None:
         dasar = Module(title='Dasar Python', description='Belajar variabel dan kontrol alur.')
         analisis = Module(title='Analisis Data', description='Pengenalan Pandas dan Numpy.')
         db.session.add_all([dasar, analisis])
@@ -222,9 +475,43 @@ def seed_data():
     db.session.commit()
     print("✅ Data awal berhasil dimasukkan.")
 
-def init_db(app):
-    """Membuat tabel dan mengisi data awal"""
+def reset_schema():
+    """Menghapus dan membuat ulang schema public (development only)."""
+    print("⚠️ Menghapus schema public (development only)...")
+    db.session.execute(text('DROP SCHEMA public CASCADE;'))
+    db.session.execute(text('CREATE SCHEMA public;'))
+    db.session.commit()
+
+
+def init_db(app, seed=True):
+    """Membuat tabel, mengisi data awal, dan menjalankan migrasi (dipanggil oleh `flask init-db`)."""
     with app.app_context():
         # db.drop_all() # Hapus ini jika Anda tidak ingin menghapus database lama
         db.create_all()
-        seed_data()
\ No newline at end of file
+        if seed:
+            seed_data()
+        # Dijalankan setelah seed agar lesson_stats ikut terisi untuk data awal
+        upgrade_schema()
+
+
+def check_schema(app):
+    """
+    Pemeriksaan murah saat worker start: hanya membaca versi skema.
+    Jika database tertinggal, migrasi dijalankan otomatis hanya bila AUTO_MIGRATE=1;
+    selain itu hanya dicatat di log (jalankan `flask init-db` saat deploy).
+    """
+    try:
+        current = current_schema_version()
+    except SQLAlchemyError as e:
+        app.logger.warning("Versi skema database tidak bisa diperiksa: %s", e)
+        return
+
+    if current >= LATEST_SCHEMA_VERSION:
+        return
+    if app.config.get('AUTO_MIGRATE'):
+        init_db(app)
+        return
+    app.logger.warning(
+        "Skema database versi %s, aplikasi membutuhkan versi %s. Jalankan `flask init-db`.",
+        current, LATEST_SCHEMA_VERSION
+    )
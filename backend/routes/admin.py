@@ -1,10 +1,20 @@
 # backend/routes/admin.py
-from flask import Blueprint, render_template, redirect, url_for, flash, session, request
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, session, request, jsonify, Response, stream_with_context
 from functools import wraps
+from sqlalchemy import text
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash
-from backend.models import db, Module, Lesson, Question, Progress, UserAnswer, User, ContactMessage 
-from backend.utils.google_drive import upload_to_drive
+from backend.models import db, Module, Lesson, Question, User, ContactMessage
+from backend.utils.progress import recompute_progress
+from backend.utils.stats import refresh_lesson_stats, refresh_module_stats
+from backend.utils.lessons import invalidate_lesson
+from backend.utils.jobs import job_status
+from backend.utils.uploads import claim_staged_file, staged_sha256
+from backend.utils.deletion import count_answer_rows, delete_lesson_rows, delete_module_rows, enqueue_delete, delete_job_states
+from backend.utils.cache import cache_stats
+from backend.utils.db_pool import pool_status
+from backend.utils.importer import IMPORT_FORMATS, iter_import_rows, import_questions
+from backend.utils.export import EXPORT_FORMATS, PROGRESS_EXPORT_SQL, ANSWERS_EXPORT_SQL, stream_query
 import os
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -157,17 +167,27 @@ def add_admin():
 # ============================================================
 # Daftar Pesan Masuk (Contact Messages) 
 # ============================================================
+def inbox_query():
+    """Pesan kontak, belum dibaca dulu lalu yang terbaru (juga diperiksa oleh `flask check-query-plans`)."""
+    return ContactMessage.query.order_by(
+        ContactMessage.is_read.asc(),
+        ContactMessage.timestamp.desc()
+    )
+
+
+def unread_query():
+    """Pesan kontak yang belum dibaca."""
+    return ContactMessage.query.filter_by(is_read=False)
+
+
 @admin_bp.route('/contact-messages')
 @admin_required
 def contact_messages():
     """Menampilkan semua pesan yang diterima dari formulir kontak."""
     try:
-        messages = ContactMessage.query.order_by(
-            ContactMessage.is_read.asc(),
-            ContactMessage.timestamp.desc()
-        ).all()
+        messages = inbox_query().all()
         
-        unread_count = ContactMessage.query.filter_by(is_read=False).count()
+        unread_count = unread_query().count()
         
         return render_template('admin_contact.html', 
                                messages=messages, 
@@ -222,6 +242,24 @@ def delete_contact(message_id):
     return redirect(url_for('admin.contact_messages'))
 
 
+# ============================================================
+# Statistik Cache (hit/miss per proses worker)
+# ============================================================
+@admin_bp.route('/cache-stats')
+@admin_required
+def cache_stats_view():
+    return jsonify(cache_stats())
+
+
+# ============================================================
+# Statistik Pool Koneksi Database (per proses worker)
+# ============================================================
+@admin_bp.route('/pool-stats')
+@admin_required
+def pool_stats_view():
+    return jsonify(pool_status(db.engine))
+
+
 # ============================================================
 # Daftar Modul
 # ============================================================
@@ -229,10 +267,12 @@ def delete_contact(message_id):
 @admin_required
 def modules_list():
     modules = Module.query.order_by(Module.id).all()
-    return render_template('admin_modules_list.html', modules=modules)
+    # Status delete job (sedang dihapus / gagal dihapus) untuk modul yang masih ada
+    delete_jobs = delete_job_states(db.session, 'module')
+    return render_template('admin_modules_list.html', modules=modules, delete_jobs=delete_jobs)
 
 
-# Upload Materi PDF ke Google Drive
+# Upload Materi PDF (Google Drive lewat upload job, atau penyimpanan lokal; lihat utils/storage.py)
 @admin_bp.route('/add-lesson', methods=['GET', 'POST'])
 @admin_required
 def add_lesson():
@@ -254,23 +294,30 @@ def add_lesson():
             flash('File harus berformat PDF.', 'danger')
             return redirect(url_for('admin.dashboard'))
 
+        staged_path = None
         try:
             filename = secure_filename(pdf_file.filename)
-            os.makedirs('tmp', exist_ok=True)
-            temp_path = os.path.join('tmp', filename)
-            pdf_file.save(temp_path)
+            digest = staged_sha256(pdf_file)
+            # File sudah dialirkan langsung ke folder staging saat request dibaca (tanpa salinan di tmp/)
+            staged_path = claim_staged_file(request, pdf_file, suffix='.pdf')
 
-            file_id = upload_to_drive(temp_path, filename)
-            pdf_url = f"https://drive.google.com/file/d/{file_id}/preview"
-
-            new_lesson = Lesson(module_id=module_id, title=title, pdf_url=pdf_url)
+            new_lesson = Lesson(module_id=module_id, title=title)
             db.session.add(new_lesson)
+            db.session.flush()
+            current_app.extensions['pdf_storage'].store(db.session, new_lesson, staged_path, filename, digest)
+            refresh_lesson_stats(db.session, new_lesson.id)
             db.session.commit()
-            os.remove(temp_path)
+            invalidate_lesson(new_lesson.id)
 
-            flash(f'Materi "{title}" berhasil diunggah ke Google Drive ✅', 'success')
+            if new_lesson.pdf_status == 'pending':
+                current_app.extensions['upload_jobs'].wake()
+                flash(f'Materi "{title}" ditambahkan, PDF sedang diunggah ke Google Drive di latar belakang ⏳', 'success')
+            else:
+                flash(f'Materi "{title}" berhasil diunggah ✅', 'success')
         except Exception as e:
             db.session.rollback()
+            if staged_path and os.path.exists(staged_path):
+                os.remove(staged_path)
             flash(f'❌ Gagal upload PDF: {e}', 'danger')
 
         return redirect(url_for('admin.dashboard'))
@@ -278,6 +325,16 @@ def add_lesson():
     return render_template('admin_dashboard.html', modules=modules)
 
 
+# Status Upload Job (dipantau dari halaman daftar pelajaran)
+@admin_bp.route('/upload-jobs/<int:id>')
+@admin_required
+def upload_job_status(id):
+    status = job_status(id)
+    if status is None:
+        return jsonify({'status': 'error', 'message': 'Job tidak ditemukan'}), 404
+    return jsonify(status)
+
+
 # Tambah Modul & Soal
 @admin_bp.route('/add-content', methods=['POST'])
 @admin_required
@@ -293,6 +350,8 @@ def add_content():
                 return redirect(url_for('admin.dashboard'))
             new_module = Module(title=title, description=desc)
             db.session.add(new_module)
+            db.session.flush()
+            refresh_module_stats(db.session, new_module.id)
             flash(f'Modul "{title}" berhasil ditambahkan ✅', 'success')
 
         elif content_type == 'question':
@@ -312,12 +371,23 @@ def add_content():
                 points=points
             )
             db.session.add(new_question)
+            db.session.flush()
+
+            # Perbarui cache total soal dan status completed learner di pelajaran ini
+            refresh_lesson_stats(db.session, lesson_id)
+            recompute_progress(db.session, lesson_id)
             flash('Soal berhasil ditambahkan ✅', 'success')
 
         else:
             flash('Tipe konten tidak valid.', 'danger')
 
         db.session.commit()
+
+        if content_type == 'question':
+            invalidate_lesson(lesson_id)
+        elif content_type == 'module':
+            # Modul baru belum punya pelajaran, tapi katalog /modules berubah
+            invalidate_lesson()
     except Exception as e:
         db.session.rollback()
         flash(f'❌ Gagal menambahkan konten: {e}', 'danger')
@@ -325,6 +395,37 @@ def add_content():
     return redirect(url_for('admin.dashboard'))
 
 
+# Import Soal Massal (CSV / JSON)
+@admin_bp.route('/import-questions', methods=['POST'])
+@admin_required
+def import_questions_route():
+    file = request.files.get('import_file')
+    if not file or not file.filename:
+        flash('Pilih file CSV atau JSON untuk diimport.', 'warning')
+        return redirect(url_for('admin.dashboard'))
+
+    fmt = file.filename.rsplit('.', 1)[-1].lower()
+    if fmt in ('ndjson', 'jsonl'):
+        fmt = 'json'
+    if fmt not in IMPORT_FORMATS:
+        flash('Format file harus .csv atau .json.', 'warning')
+        return redirect(url_for('admin.dashboard'))
+
+    report = import_questions(db.engine, iter_import_rows(file.stream, fmt))
+
+    total = report['inserted']['short'] + report['inserted']['mcq']
+    flash(f"Import selesai: {report['inserted']['short']} soal isian, "
+          f"{report['inserted']['mcq']} soal pilihan ganda ({total} soal) ✅",
+          'success' if total else 'warning')
+    for err in report['errors'][:20]:
+        where = f"Baris {err['row']}: " if err['row'] is not None else ''
+        flash(f"❌ {where}{err['error']}", 'danger')
+    if len(report['errors']) > 20:
+        flash(f"... dan {len(report['errors']) - 20} error lainnya.", 'danger')
+
+    return redirect(url_for('admin.dashboard'))
+
+
 # Daftar Pelajaran (Lessons)
 @admin_bp.route('/lessons-list')
 @admin_required
@@ -333,9 +434,12 @@ def lessons_list():
         Lesson.id,
         Lesson.title,
         Lesson.pdf_url,
+        Lesson.pdf_status,
+        Lesson.deleting,
         Module.title.label('module_title')
     ).order_by(Module.id, Lesson.id).all()
-    return render_template('admin_lessons_list.html', lessons=lessons)
+    delete_jobs = delete_job_states(db.session, 'lesson')
+    return render_template('admin_lessons_list.html', lessons=lessons, delete_jobs=delete_jobs)
 
 
 # Daftar Soal
@@ -360,31 +464,100 @@ def questions_list():
     return render_template('admin_questions_list.html', questions=questions)
 
 
-# Daftar Akun dan Progres Pengguna
+# Daftar Akun dan Progres Pengguna (keyset pagination)
+USERS_PER_PAGE = 50
+
+# Urutan yang didukung: kolom kunci, arah, dan kondisi "setelah kursor"
+USER_SORTS = {
+    'id': ("u.id", "u.id > :after_id"),
+    'email': ("u.email, u.id", "(u.email, u.id) > (:after_key, :after_id)"),
+    # Progres: jumlah pelajaran selesai terbanyak dulu, id sebagai pemecah seri
+    'progress': ("u.completed_lessons DESC, u.id",
+                 "(u.completed_lessons < :after_key OR "
+                 "(u.completed_lessons = :after_key AND u.id > :after_id))"),
+}
+
+USER_SEARCH_FILTER = "(u.name ILIKE :pattern OR u.email ILIKE :pattern)"
+
+
+def users_page_sql(sort, filters):
+    """
+    Query satu halaman daftar user (keyset) untuk urutan `sort` dan kondisi `filters`.
+    Juga diperiksa oleh `flask check-query-plans` (utils/query_plans.py).
+    """
+    order_by = USER_SORTS[sort][0]
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+    if sort == 'progress':
+        # Urut berdasarkan progres butuh hitungan semua user (memakai partial index progress)
+        source = """
+            SELECT users.id, users.name, users.email, users.is_admin,
+                   COALESCE(c.completed_lessons, 0) AS completed_lessons
+            FROM users
+            LEFT JOIN (
+                SELECT user_id, COUNT(*) AS completed_lessons
+                FROM progress WHERE completed GROUP BY user_id
+            ) c ON c.user_id = users.id
+        """
+        return f"""
+            SELECT * FROM ({source}) u
+            {where}
+            ORDER BY {order_by}
+            LIMIT :limit
+        """
+
+    # Ambil satu halaman user dulu, baru hitung pelajaran selesai hanya untuk halaman itu
+    return f"""
+        SELECT u.id, u.name, u.email, u.is_admin, c.completed_lessons
+        FROM (
+            SELECT u.id, u.name, u.email, u.is_admin
+            FROM users u
+            {where}
+            ORDER BY {order_by}
+            LIMIT :limit
+        ) u
+        CROSS JOIN LATERAL (
+            SELECT COUNT(*) AS completed_lessons
+            FROM progress p WHERE p.user_id = u.id AND p.completed
+        ) c
+        ORDER BY {order_by}
+    """
+
+
 @admin_bp.route('/users-progress-list')
 @admin_required
 def users_progress_list():
-    total_lessons = db.session.query(Lesson).count()
-    
-    all_users = db.session.query(
-        User.id,
-        User.name, 
-        User.email,
-        User.is_admin
-    ).order_by(User.id).all()
-    
-    progress_data = db.session.query(
-        Progress.user_id,
-        db.func.count(db.distinct(Progress.lesson_id)).label('completed_lessons_count')
-    ).filter(Progress.completed == True) \
-    .group_by(Progress.user_id) \
-    .all()
-    
-    progress_map = {item.user_id: item.completed_lessons_count for item in progress_data}
+    total_lessons = db.session.query(Lesson).filter(Lesson.deleting.is_(False)).count()
+
+    search = request.args.get('q', '').strip()
+    sort = request.args.get('sort', 'id')
+    if sort not in USER_SORTS:
+        sort = 'id'
+    after_condition = USER_SORTS[sort][1]
+
+    params = {'limit': USERS_PER_PAGE + 1}
+    filters = []
+    if search:
+        filters.append(USER_SEARCH_FILTER)
+        params['pattern'] = f"%{search}%"
+
+    after_id = request.args.get('after_id', type=int)
+    after_key = request.args.get('after_key', type=int) if sort == 'progress' else request.args.get('after_key', '')
+    if after_key is None:
+        # Kursor progres tanpa after_key angka tidak bisa dipakai: tampilkan halaman pertama
+        after_id = None
+    if after_id is not None:
+        params['after_id'] = after_id
+        params['after_key'] = after_key
+        filters.append(after_condition)
+
+    rows = db.session.execute(text(users_page_sql(sort, filters)), params).mappings().all()
+    has_next = len(rows) > USERS_PER_PAGE
+    rows = rows[:USERS_PER_PAGE]
 
     final_users_list = []
-    for user in all_users:
-        completed_lessons = progress_map.get(user.id, 0)
+    for user in rows:
+        completed_lessons = user['completed_lessons']
         
         if total_lessons > 0:
             total_progress_percent = round((completed_lessons / total_lessons) * 100, 1)
@@ -392,21 +565,59 @@ def users_progress_list():
             total_progress_percent = 0.0
 
         final_users_list.append({
-            'id': user.id,
-            'name': user.name, 
-            'email': user.email,
-            'is_admin': user.is_admin,
+            'id': user['id'],
+            'name': user['name'], 
+            'email': user['email'],
+            'is_admin': user['is_admin'],
             'completed_lessons': completed_lessons,
             'total_progress_percent': total_progress_percent
         })
 
+    next_cursor = None
+    if has_next:
+        last = final_users_list[-1]
+        next_cursor = {
+            'after_id': last['id'],
+            'after_key': {'id': '', 'email': last['email'], 'progress': last['completed_lessons']}[sort]
+        }
+
     return render_template(
         'admin_users_list.html', 
         users=final_users_list, 
-        total_lessons=total_lessons
+        total_lessons=total_lessons,
+        search=search,
+        sort=sort,
+        next_cursor=next_cursor,
+        is_first_page=after_id is None
+    )
+
+
+# Export Progres & Jawaban (CSV / NDJSON, streaming)
+def _export_response(sql, name):
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        flash('Format export tidak valid (gunakan csv atau ndjson).', 'warning')
+        return redirect(url_for('admin.users_progress_list'))
+
+    return Response(
+        stream_with_context(stream_query(db.engine, sql, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={name}.{fmt}'}
     )
 
 
+@admin_bp.route('/export/progress')
+@admin_required
+def export_progress():
+    return _export_response(PROGRESS_EXPORT_SQL, 'progress')
+
+
+@admin_bp.route('/export/answers')
+@admin_required
+def export_answers():
+    return _export_response(ANSWERS_EXPORT_SQL, 'answers')
+
+
 # Hapus Pengguna (User)
 @admin_bp.route('/delete/user/<int:id>', methods=['POST'])
 @admin_required
@@ -431,17 +642,26 @@ def delete_user(id):
 @admin_bp.route('/delete/module/<int:id>', methods=['POST'])
 @admin_required
 def delete_module(id):
-    module = Module.query.get_or_404(id)
+    title = Module.query.get_or_404(id).title
     try:
-        lessons = Lesson.query.filter_by(module_id=id).all()
-        for lesson in lessons:
-            Question.query.filter_by(lesson_id=lesson.id).delete()
-            Progress.query.filter_by(lesson_id=lesson.id).delete()
-            db.session.delete(lesson)
-
-        db.session.delete(module)
+        lesson_ids = [lid for (lid,) in db.session.query(Lesson.id).filter_by(module_id=id)]
+        threshold = current_app.config['BULK_DELETE_THRESHOLD']
+        if count_answer_rows(db.session, lesson_ids, threshold + 1) > threshold:
+            queued = enqueue_delete(db.session, 'module', id, title)
+            db.session.commit()
+            invalidate_lesson(*lesson_ids)
+            current_app.extensions['delete_jobs'].wake()
+            if queued:
+                flash(f'Modul "{title}" berisi banyak data dan sedang dihapus bertahap di latar belakang ⏳', 'info')
+            else:
+                flash(f'Modul "{title}" sudah dalam antrian penghapusan ⏳', 'info')
+            return redirect(url_for('admin.modules_list'))
+
+        # Pelajaran, soal, jawaban, progress, dan stats ikut terhapus lewat ON DELETE CASCADE
+        lesson_ids = delete_module_rows(db.session, id)
         db.session.commit()
-        flash(f'Modul "{module.title}" dan seluruh isinya berhasil dihapus ✅', 'success')
+        invalidate_lesson(*lesson_ids)
+        flash(f'Modul "{title}" dan seluruh isinya berhasil dihapus ✅', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'❌ Gagal menghapus modul: {e}', 'danger')
@@ -452,13 +672,24 @@ def delete_module(id):
 @admin_bp.route('/delete/lesson/<int:id>', methods=['POST'])
 @admin_required
 def delete_lesson(id):
-    lesson = Lesson.query.get_or_404(id)
+    title = Lesson.query.get_or_404(id).title
     try:
-        Question.query.filter_by(lesson_id=id).delete()
-        Progress.query.filter_by(lesson_id=id).delete()
-        db.session.delete(lesson)
+        threshold = current_app.config['BULK_DELETE_THRESHOLD']
+        if count_answer_rows(db.session, [id], threshold + 1) > threshold:
+            queued = enqueue_delete(db.session, 'lesson', id, title)
+            db.session.commit()
+            invalidate_lesson(id)
+            current_app.extensions['delete_jobs'].wake()
+            if queued:
+                flash(f'Pelajaran "{title}" berisi banyak data dan sedang dihapus bertahap di latar belakang ⏳', 'info')
+            else:
+                flash(f'Pelajaran "{title}" sudah dalam antrian penghapusan ⏳', 'info')
+            return redirect(url_for('admin.lessons_list'))
+
+        delete_lesson_rows(db.session, id)
         db.session.commit()
-        flash(f'Pelajaran "{lesson.title}" berhasil dihapus ✅', 'success')
+        invalidate_lesson(id)
+        flash(f'Pelajaran "{title}" berhasil dihapus ✅', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'❌ Gagal menghapus pelajaran: {e}', 'danger')
@@ -471,9 +702,14 @@ def delete_lesson(id):
 def delete_question(id):
     question = Question.query.get_or_404(id)
     try:
-        UserAnswer.query.filter_by(question_id=id).delete()
+        lesson_id = question.lesson_id
         db.session.delete(question)
+        db.session.flush()
+
+        refresh_lesson_stats(db.session, lesson_id)
+        recompute_progress(db.session, lesson_id)
         db.session.commit()
+        invalidate_lesson(lesson_id)
         flash('Soal berhasil dihapus ✅', 'success')
     except Exception as e:
         db.session.rollback()
@@ -1,7 +1,8 @@
 # backend/routes/auth.py (Versi PostgreSQL dengan SQLAlchemy)
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from werkzeug.security import generate_password_hash, check_password_hash
-from backend.models import db, User, Module, Lesson, Progress, Question
+from backend.models import db, User, Progress
+from backend.utils.progress import progress_summary
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -88,24 +89,6 @@ def profile():
         flash('User tidak ditemukan.', 'danger')
         return redirect(url_for('auth.login'))
 
-    # Ambil progres belajar (gabungan Module, Lesson, Progress)
-    progress_data = (
-        db.session.query(
-            Module.title.label("module_title"),
-            Lesson.title.label("lesson_title"),
-            Lesson.id.label("lesson_id"),
-            Progress.score,
-            db.func.sum(Question.points).label("max_score"),
-            Progress.completed
-        )
-        .join(Lesson, Lesson.module_id == Module.id)
-        .outerjoin(Progress, (Progress.lesson_id == Lesson.id) & (Progress.user_id == user_id))
-        .outerjoin(Question, Question.lesson_id == Lesson.id)
-        .group_by(Module.id, Lesson.id, Progress.score, Progress.completed)
-        .order_by(Module.id, Lesson.id)
-        .all()
-    )
-
     if request.method == 'POST':
         new_name = request.form.get('name', '').strip()
         new_email = request.form.get('email', '').strip().lower()
@@ -126,6 +109,9 @@ def profile():
         flash('Profil berhasil diperbarui.', 'success')
         return redirect(url_for('auth.profile'))
 
+    # Ambil progres belajar (gabungan Module, Lesson, lesson_stats, Progress)
+    progress_data = progress_summary(db.session, user_id)
+
     return render_template('profile.html', user=user, progress_data=progress_data)
 
 
@@ -1,14 +1,66 @@
-from flask import Blueprint, render_template, session, redirect, url_for, flash, request, jsonify
+import os
+from flask import Blueprint, current_app, render_template, session, redirect, url_for, flash, request, jsonify, send_file, abort
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from backend.models import db, ContactMessage, Question, UserAnswer, MultipleChoiceQuestion, MultipleChoiceAnswer, Progress
+from backend.utils.progress import apply_progress_delta, recompute_lesson_progress
+from backend.utils.lessons import load_lesson_detail, get_answer_key, get_lesson_answer_keys, forget_answer_keys
+from backend.utils.storage import DIGEST_RE
+from backend.utils.http_cache import conditional_page
 from datetime import datetime 
 
 main_bp = Blueprint('main', __name__)
 
+# Cache browser/CDN untuk PDF content-addressed (1 tahun)
+PDF_MAX_AGE = 365 * 24 * 3600
+
+# Query halaman modul (juga diperiksa oleh `flask check-query-plans`)
+MODULES_SQL = """
+    SELECT
+        m.id,
+        m.title,
+        m.description,
+        COALESCE((
+            SELECT SUM(p.score)
+            FROM lessons l 
+            JOIN progress p ON l.id = p.lesson_id
+            WHERE l.module_id = m.id AND p.user_id = :uid AND NOT l.deleting
+        ), 0) AS total_score,
+        
+        -- Skor maksimal dibaca dari module_stats (dipelihara oleh admin routes)
+        COALESCE(ms.max_score, 0) AS max_score
+
+    FROM modules m
+    LEFT JOIN module_stats ms ON ms.module_id = m.id
+    WHERE NOT m.deleting
+    ORDER BY m.id
+"""
+
+MODULE_SQL = "SELECT * FROM modules WHERE id = :id AND NOT deleting"
+
+MODULE_LESSONS_SQL = """
+    SELECT
+        l.id,
+        l.title,
+        COALESCE(p.score, 0) AS score,
+        COALESCE(CAST(p.completed AS INTEGER), 0) AS completed,
+        
+        -- Skor maksimal dibaca dari lesson_stats (dipelihara oleh admin routes)
+        COALESCE(ls.max_score, 0) AS max_score
+
+    FROM lessons l
+    LEFT JOIN progress p ON l.id = p.lesson_id AND p.user_id = :uid
+    LEFT JOIN lesson_stats ls ON ls.lesson_id = l.id
+    WHERE l.module_id = :mid AND NOT l.deleting
+    ORDER BY l.id
+"""
+
 # ---------------------------------------------
 # 1. HOME PAGE
 # ---------------------------------------------
 @main_bp.route('/')
+@conditional_page(versions=False)
 def home():
     user_name = session.get('user_name')
     return render_template('home.html', user_name=user_name)
@@ -18,6 +70,7 @@ def home():
 # 2. TAMPILAN MODULES (KATEGORI UTAMA)
 # ---------------------------------------------
 @main_bp.route('/modules')
+@conditional_page
 def modules():
     """Daftar Modul Utama (Kategori) + Progres Total."""
     if 'user_id' not in session:
@@ -27,37 +80,8 @@ def modules():
     user_id = session['user_id']
 
     try:
-        with db.engine.connect() as conn:
-            query = text("""
-                SELECT
-                    m.id,
-                    m.title,
-                    m.description,
-                    COALESCE((
-                        SELECT SUM(p.score)
-                        FROM lessons l 
-                        JOIN progress p ON l.id = p.lesson_id
-                        WHERE l.module_id = m.id AND p.user_id = :uid
-                    ), 0) AS total_score,
-                    
-                    -- 🚨 MODIFIKASI: Hitung total maksimal score dari Question DAN MultipleChoiceQuestion
-                    COALESCE((
-                        SELECT SUM(q.points)
-                        FROM lessons l 
-                        JOIN questions q ON l.id = q.lesson_id
-                        WHERE l.module_id = m.id
-                    ), 0) +
-                    COALESCE((
-                        SELECT SUM(mcq.points)
-                        FROM lessons l 
-                        JOIN multiple_choice_questions mcq ON l.id = mcq.lesson_id
-                        WHERE l.module_id = m.id
-                    ), 0) AS max_score
-
-                FROM modules m
-                ORDER BY m.id
-            """)
-            mods = conn.execute(query, {"uid": user_id}).mappings().all()
+        conn = db.session.connection()
+        mods = conn.execute(text(MODULES_SQL), {"uid": user_id}).mappings().all()
 
         return render_template('modules.html', modules=mods)
 
@@ -71,6 +95,7 @@ def modules():
 # 3. DETAIL MODULE (DAFTAR LESSONS/SUB-MODUL)
 # ---------------------------------------------
 @main_bp.route('/modules/<int:id>')
+@conditional_page
 def module_detail(id):
     """Menampilkan daftar pelajaran (lessons) untuk Modul Utama tertentu."""
     if 'user_id' not in session:
@@ -80,33 +105,14 @@ def module_detail(id):
     user_id = session['user_id']
 
     try:
-        with db.engine.connect() as conn:
-            mod = conn.execute(text("SELECT * FROM modules WHERE id = :id"), {"id": id}).mappings().first()
-
-            if not mod:
-                flash('Modul tidak ditemukan.', 'danger')
-                return redirect(url_for('main.modules'))
-
-            lessons = conn.execute(text("""
-                SELECT
-                    l.id,
-                    l.title,
-                    COALESCE(p.score, 0) AS score,
-                    COALESCE(CAST(p.completed AS INTEGER), 0) AS completed,
-                    
-                    -- 🚨 MODIFIKASI: Hitung total maksimal score dari Question DAN MultipleChoiceQuestion
-                    COALESCE((
-                        SELECT SUM(points) FROM questions WHERE lesson_id = l.id
-                    ), 0) +
-                    COALESCE((
-                        SELECT SUM(points) FROM multiple_choice_questions WHERE lesson_id = l.id
-                    ), 0) AS max_score
-
-                FROM lessons l
-                LEFT JOIN progress p ON l.id = p.lesson_id AND p.user_id = :uid
-                WHERE l.module_id = :mid
-                ORDER BY l.id
-            """), {"uid": user_id, "mid": id}).mappings().all()
+        conn = db.session.connection()
+        mod = conn.execute(text(MODULE_SQL), {"id": id}).mappings().first()
+
+        if not mod:
+            flash('Modul tidak ditemukan.', 'danger')
+            return redirect(url_for('main.modules'))
+
+        lessons = conn.execute(text(MODULE_LESSONS_SQL), {"uid": user_id, "mid": id}).mappings().all()
 
         return render_template('module_lessons.html', module=mod, lessons=lessons)
 
@@ -120,6 +126,7 @@ def module_detail(id):
 # 4. DETAIL LESSON (KONTEN + SOAL) - DIMODIFIKASI
 # ---------------------------------------------
 @main_bp.route('/lessons/<int:id>')
+@conditional_page
 def lesson_detail(id):
     """Menampilkan konten pelajaran dan soal latihan."""
     if 'user_id' not in session:
@@ -129,56 +136,21 @@ def lesson_detail(id):
     user_id = session['user_id']
 
     try:
-        with db.engine.connect() as conn:
-            lesson = conn.execute(text("SELECT * FROM lessons WHERE id = :id"), {"id": id}).mappings().first()
-            if not lesson:
-                flash('Pelajaran tidak ditemukan.', 'danger')
-                return redirect(url_for('main.modules'))
-
-            # 🚨 BARU: Ambil Soal Pilihan Ganda (MCQs)
-            mcqs = conn.execute(
-                text("SELECT * FROM multiple_choice_questions WHERE lesson_id = :id ORDER BY id"), {"id": id}
-            ).mappings().all()
-
-            # Ambil Soal Isian Singkat (Existing)
-            questions = conn.execute(
-                text("SELECT * FROM questions WHERE lesson_id = :id ORDER BY id"), {"id": id}
-            ).mappings().all()
-
-            # Ambil Jawaban Isian Singkat yang sudah dijawab
-            answered_short = conn.execute(text("""
-                SELECT question_id FROM user_answers
-                WHERE user_id = :uid AND question_id IN (
-                    SELECT id FROM questions WHERE lesson_id = :lid
-                )
-            """), {"uid": user_id, "lid": id}).mappings().all()
-            
-            # 🚨 BARU: Ambil Jawaban Pilihan Ganda yang sudah dijawab
-            answered_mcq = conn.execute(text("""
-                SELECT question_id, user_choice, is_correct FROM multiple_choice_answers
-                WHERE user_id = :uid AND question_id IN (
-                    SELECT id FROM multiple_choice_questions WHERE lesson_id = :lid
-                )
-            """), {"uid": user_id, "lid": id}).mappings().all()
-
-
-        # Proses ID soal yang sudah dijawab (untuk Isian Singkat)
-        answered_ids_short = {row['question_id'] for row in answered_short}
-        
-        # Proses ID soal yang sudah dijawab (untuk Pilihan Ganda)
-        answered_mcqs_map = {
-            row['question_id']: {'choice': row['user_choice'], 'correct': row['is_correct']} 
-            for row in answered_mcq
-        }
+        # Pelajaran, kedua tipe soal, dan status jawaban user dalam satu round trip
+        conn = db.session.connection()
+        detail = load_lesson_detail(conn, id, user_id)
 
+        if not detail:
+            flash('Pelajaran tidak ditemukan.', 'danger')
+            return redirect(url_for('main.modules'))
 
         return render_template(
             'lesson_detail.html',
-            lesson=lesson,
-            questions=questions,          # Soal Isian Singkat
-            mcqs=mcqs,                    # Soal Pilihan Ganda
-            answered_ids_short=answered_ids_short, # Status Isian Singkat
-            answered_mcqs_map=answered_mcqs_map    # Status Pilihan Ganda
+            lesson=detail['lesson'],
+            questions=detail['questions'],                    # Soal Isian Singkat
+            mcqs=detail['mcqs'],                              # Soal Pilihan Ganda
+            answered_ids_short=detail['answered_ids_short'],  # Status Isian Singkat
+            answered_mcqs_map=detail['answered_mcqs_map']     # Status Pilihan Ganda
         )
 
     except Exception as e:
@@ -188,78 +160,30 @@ def lesson_detail(id):
 
 
 # ---------------------------------------------
-# FUNGSI BANTUAN: UPDATE PROGRESS UTAMA
+# 5. FILE PDF PELAJARAN (PDF_STORAGE=local)
 # ---------------------------------------------
-def update_lesson_progress(conn, user_id, lesson_id):
-    """
-    Menghitung ulang total skor dan status completed untuk Lesson, 
-    berdasarkan kedua tipe soal (Question dan MCQ).
-    """
-    
-    # 1. Hitung total skor yang didapat (dari kedua tipe soal)
-    total_score_short = conn.execute(text("""
-        SELECT COALESCE(SUM(q.points), 0)
-        FROM user_answers ua
-        JOIN questions q ON ua.question_id = q.id
-        WHERE ua.user_id = :uid AND q.lesson_id = :lid
-    """), {"uid": user_id, "lid": lesson_id}).scalar() or 0
-
-    total_score_mcq = conn.execute(text("""
-        SELECT COALESCE(SUM(mcq.points), 0)
-        FROM multiple_choice_answers mca
-        JOIN multiple_choice_questions mcq ON mca.question_id = mcq.id
-        WHERE mca.user_id = :uid AND mcq.lesson_id = :lid AND mca.is_correct = TRUE
-    """), {"uid": user_id, "lid": lesson_id}).scalar() or 0
-    
-    total_score = total_score_short + total_score_mcq
-
-    # 2. Hitung total soal (dari kedua tipe soal)
-    total_questions = conn.execute(text("""
-        SELECT COUNT(id) FROM questions WHERE lesson_id = :lid
-    """), {"lid": lesson_id}).scalar() or 0
-    
-    total_mcqs = conn.execute(text("""
-        SELECT COUNT(id) FROM multiple_choice_questions WHERE lesson_id = :lid
-    """), {"lid": lesson_id}).scalar() or 0
-    
-    total_all_q = total_questions + total_mcqs
-
-
-    # 3. Hitung total soal yang sudah dijawab dengan benar
-    correct_short = conn.execute(text("""
-        SELECT COUNT(DISTINCT question_id)
-        FROM user_answers
-        WHERE user_id = :uid AND question_id IN (
-            SELECT id FROM questions WHERE lesson_id = :lid
-        )
-    """), {"uid": user_id, "lid": lesson_id}).scalar() or 0
-
-    correct_mcq = conn.execute(text("""
-        SELECT COUNT(DISTINCT question_id)
-        FROM multiple_choice_answers
-        WHERE user_id = :uid AND question_id IN (
-            SELECT id FROM multiple_choice_questions WHERE lesson_id = :lid
-        ) AND is_correct = TRUE
-    """), {"uid": user_id, "lid": lesson_id}).scalar() or 0
-    
-    correct_all_q = correct_short + correct_mcq
-
-    # 4. Tentukan status completed
-    completed = True if total_all_q > 0 and correct_all_q >= total_all_q else False
-
-    # 5. Upsert progress
-    conn.execute(text("""
-        INSERT INTO progress (user_id, lesson_id, score, completed, last_update)
-        VALUES (:uid, :lid, :score, :comp, NOW())
-        ON CONFLICT (user_id, lesson_id)
-        DO UPDATE SET score = EXCLUDED.score, completed = EXCLUDED.completed, last_update = NOW()
-    """), {"uid": user_id, "lid": lesson_id, "score": total_score, "comp": completed})
-    
-    return completed # Mengembalikan status penyelesaian
+@main_bp.route('/files/pdf/<digest>.pdf')
+def lesson_pdf(digest):
+    storage = current_app.extensions['pdf_storage']
+    if not DIGEST_RE.match(digest) or not hasattr(storage, 'path_for'):
+        abort(404)
+
+    path = storage.path_for(digest)
+    if not os.path.exists(path):
+        abort(404)
+
+    # Nama file = hash isi, jadi isinya tidak pernah berubah: aman di-cache selamanya.
+    # conditional=True menangani If-None-Match (304) dan HTTP Range (206);
+    # tanpa Range, body dikirim lewat wsgi.file_wrapper (sendfile di gunicorn).
+    response = send_file(path, mimetype='application/pdf', conditional=True,
+                         etag=digest, max_age=PDF_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 
 # ---------------------------------------------
-# 5. API CHECK ANSWER (Isian Singkat) - DIMODIFIKASI
+# 6. API CHECK ANSWER (Isian Singkat) - DIMODIFIKASI
 # ---------------------------------------------
 @main_bp.route('/check_answer', methods=['POST'])
 def check_answer():
@@ -272,38 +196,45 @@ def check_answer():
     question_id = data.get('question_id')
     user_answer = (data.get('answer') or '').strip().lower()
 
-    if not question_id:
+    try:
+        question_id = int(question_id)
+    except (TypeError, ValueError):
         return jsonify({'status': 'error', 'message': 'ID soal tidak valid.'})
 
     try:
-        with db.engine.begin() as conn:
-            q_data = conn.execute(text("""
-                SELECT lesson_id, answer FROM questions WHERE id = :qid
-            """), {"qid": question_id}).mappings().first()
-
-            if not q_data:
-                return jsonify({'status': 'error', 'message': 'Soal isian singkat tidak ditemukan.'})
-
-            lesson_id = q_data['lesson_id']
-            correct_answer = q_data['answer'].strip().lower()
-            
-            is_correct = (user_answer == correct_answer)
-
-            if is_correct:
-                # Simpan jawaban benar (jika belum)
-                conn.execute(text("""
-                    INSERT INTO user_answers (user_id, question_id)
-                    VALUES (:uid, :qid)
-                    ON CONFLICT (user_id, question_id) DO NOTHING
-                """), {"uid": user_id, "qid": question_id})
-
-                # Update Progres Lesson
-                update_lesson_progress(conn, user_id, lesson_id)
-
-                return jsonify({'status': 'correct', 'message': '✅ Jawaban Benar! Progres diperbarui.'})
-
-            else:
-                return jsonify({'status': 'wrong', 'message': '❌ Jawaban Salah. Coba lagi!'})
+        # Kunci jawaban dari cache (DB hanya dibaca saat cache miss)
+        q_data = get_answer_key(db.session.connection, 'short', question_id)
+
+        if not q_data:
+            return jsonify({'status': 'error', 'message': 'Soal isian singkat tidak ditemukan.'})
+
+        lesson_id = q_data['lesson_id']
+        is_correct = (user_answer == q_data['answer'])
+
+        if not is_correct:
+            return jsonify({'status': 'wrong', 'message': '❌ Jawaban Salah. Coba lagi!'})
+
+        try:
+            conn = db.session.connection()
+            # Simpan jawaban benar (jika belum)
+            inserted = conn.execute(text("""
+                INSERT INTO user_answers (user_id, question_id)
+                VALUES (:uid, :qid)
+                ON CONFLICT (user_id, question_id) DO NOTHING
+                RETURNING id
+            """), {"uid": user_id, "qid": question_id}).first()
+
+            # Update Progres Lesson (hanya jika jawaban benar ini baru tersimpan)
+            if inserted:
+                apply_progress_delta(conn, user_id, lesson_id, q_data['points'], 1)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            # Soal sudah dihapus admin, kunci jawaban di cache worker ini masih lama
+            forget_answer_keys(lesson_id)
+            return jsonify({'status': 'error', 'message': 'Soal isian singkat tidak ditemukan.'})
+
+        return jsonify({'status': 'correct', 'message': '✅ Jawaban Benar! Progres diperbarui.'})
 
     except Exception as e:
         print("❌ Database Error di check_answer (Isian Singkat):", e)
@@ -328,50 +259,71 @@ def submit_mcq_answer():
         return jsonify({'status': 'error', 'message': 'Pilihan jawaban tidak valid.'})
 
     try:
-        with db.engine.begin() as conn:
-            # 1. Ambil data soal
-            mcq_data = conn.execute(text("""
-                SELECT lesson_id, correct_option, points FROM multiple_choice_questions WHERE id = :qid
-            """), {"qid": question_id}).mappings().first()
-
-            if not mcq_data:
-                return jsonify({'status': 'error', 'message': 'Soal pilihan ganda tidak ditemukan.'})
-
-            lesson_id = mcq_data['lesson_id']
-            correct_option = mcq_data['correct_option'].strip().upper()
-            
-            is_correct = (user_choice == correct_option)
-
-            # 2. Simpan atau perbarui jawaban Pilihan Ganda
-            conn.execute(text("""
+        question_id = int(question_id)
+    except (TypeError, ValueError):
+        return jsonify({'status': 'error', 'message': 'ID soal tidak valid.'})
+
+    try:
+        # 1. Ambil kunci jawaban dari cache (DB hanya dibaca saat cache miss)
+        mcq_data = get_answer_key(db.session.connection, 'mcq', question_id)
+
+        if not mcq_data:
+            return jsonify({'status': 'error', 'message': 'Soal pilihan ganda tidak ditemukan.'})
+
+        lesson_id = mcq_data['lesson_id']
+        correct_option = mcq_data['correct_option']
+        
+        is_correct = (user_choice == correct_option)
+
+        try:
+            conn = db.session.connection()
+            # 2. Simpan jawaban Pilihan Ganda. Jawaban pertama langsung di-INSERT; jika baris
+            #    sudah ada (termasuk INSERT bersamaan dari double-click yang menunggu di unique
+            #    index), baris lama dikunci dan dibaca dulu agar delta skor dihitung sekali saja.
+            params = {"uid": user_id, "qid": question_id, "choice": user_choice, "correct": is_correct}
+            inserted = conn.execute(text("""
                 INSERT INTO multiple_choice_answers (user_id, question_id, user_choice, is_correct, answered_at)
                 VALUES (:uid, :qid, :choice, :correct, NOW())
-                ON CONFLICT (user_id, question_id)
-                DO UPDATE SET user_choice = EXCLUDED.user_choice, is_correct = EXCLUDED.is_correct, answered_at = NOW()
-            """), {
-                "uid": user_id, 
-                "qid": question_id, 
-                "choice": user_choice, 
-                "correct": is_correct
+                ON CONFLICT (user_id, question_id) DO NOTHING
+                RETURNING id
+            """), params).first()
+
+            was_correct = False
+            if not inserted:
+                was_correct = conn.execute(text("""
+                    SELECT is_correct FROM multiple_choice_answers
+                    WHERE user_id = :uid AND question_id = :qid
+                    FOR UPDATE
+                """), params).scalar()
+                conn.execute(text("""
+                    UPDATE multiple_choice_answers
+                    SET user_choice = :choice, is_correct = :correct, answered_at = NOW()
+                    WHERE user_id = :uid AND question_id = :qid
+                """), params)
+
+            # 3. Update Progres Lesson (hanya selisih dari jawaban ini)
+            correct_delta = int(is_correct) - int(bool(was_correct))
+            apply_progress_delta(conn, user_id, lesson_id, correct_delta * mcq_data['points'], correct_delta)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            # Soal sudah dihapus admin, kunci jawaban di cache worker ini masih lama
+            forget_answer_keys(lesson_id)
+            return jsonify({'status': 'error', 'message': 'Soal pilihan ganda tidak ditemukan.'})
+
+        if is_correct:
+            return jsonify({
+                'status': 'correct', 
+                'message': '✅ Jawaban Benar! Progres diperbarui.', 
+                'user_choice': user_choice
+            })
+        else:
+            return jsonify({
+                'status': 'wrong', 
+                'message': f'❌ Jawaban Salah. Jawaban yang benar adalah {correct_option}.', 
+                'user_choice': user_choice,
+                'correct_option': correct_option
             })
-            
-            # 3. Update Progres Lesson (menggunakan fungsi bantuan yang baru)
-            update_lesson_progress(conn, user_id, lesson_id)
-            
-            
-            if is_correct:
-                return jsonify({
-                    'status': 'correct', 
-                    'message': '✅ Jawaban Benar! Progres diperbarui.', 
-                    'user_choice': user_choice
-                })
-            else:
-                return jsonify({
-                    'status': 'wrong', 
-                    'message': f'❌ Jawaban Salah. Jawaban yang benar adalah {correct_option}.', 
-                    'user_choice': user_choice,
-                    'correct_option': correct_option
-                })
 
     except Exception as e:
         print("❌ Database Error di submit_mcq_answer:", e)
@@ -379,7 +331,98 @@ def submit_mcq_answer():
 
 
 # ---------------------------------------------
-# 6. SUBMIT FORMULIR KONTAK (BARU)
+# API SUBMIT SEMUA JAWABAN SATU LESSON (Batch)
+# ---------------------------------------------
+@main_bp.route('/submit_answers', methods=['POST'])
+def submit_answers():
+    """
+    Menerima semua jawaban (Isian Singkat + Pilihan Ganda) untuk satu lesson sekaligus.
+    Body JSON: {"lesson_id": 1,
+                "answers": [{"question_id": 1, "answer": "..."}],
+                "mcq_answers": [{"question_id": 2, "user_choice": "A"}]}
+    Semua jawaban dinilai dan disimpan dalam satu transaksi, progres dihitung ulang sekali.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'status': 'error', 'message': 'Anda harus login.'}), 401
+
+    data = request.get_json(silent=True) or {}
+    try:
+        lesson_id = int(data.get('lesson_id'))
+        short_items = [(int(a['question_id']), (a.get('answer') or '').strip().lower())
+                       for a in data.get('answers') or []]
+        mcq_items = [(int(a['question_id']), (a.get('user_choice') or '').strip().upper())
+                     for a in data.get('mcq_answers') or []]
+    except (TypeError, ValueError, KeyError, AttributeError):
+        return jsonify({'status': 'error', 'message': 'Format jawaban tidak valid.'}), 400
+
+    try:
+        keys = get_lesson_answer_keys(db.session.connection, lesson_id)
+
+        # 1. Nilai semua jawaban di memori (soal di luar lesson ini ditolak per item)
+        results = {'answers': {}, 'mcq_answers': {}}
+        correct_short = []
+        for qid, answer in short_items:
+            key = keys['short'].get(qid)
+            if not key:
+                results['answers'][qid] = 'not_found'
+            elif answer == key['answer']:
+                results['answers'][qid] = 'correct'
+                correct_short.append({'user_id': user_id, 'question_id': qid})
+            else:
+                results['answers'][qid] = 'wrong'
+
+        mcq_rows = {}
+        for qid, choice in mcq_items:
+            key = keys['mcq'].get(qid)
+            if not key:
+                results['mcq_answers'][qid] = 'not_found'
+            elif choice not in ['A', 'B', 'C', 'D']:
+                results['mcq_answers'][qid] = 'invalid'
+            else:
+                is_correct = (choice == key['correct_option'])
+                results['mcq_answers'][qid] = 'correct' if is_correct else 'wrong'
+                # Jawaban terakhir untuk soal yang sama yang dipakai
+                mcq_rows[qid] = {'user_id': user_id, 'question_id': qid,
+                                 'user_choice': choice, 'is_correct': is_correct}
+
+        # 2. Simpan dengan upsert multi-baris lalu hitung ulang progres sekali
+        completed = None
+        if correct_short or mcq_rows:
+            try:
+                conn = db.session.connection()
+                if correct_short:
+                    conn.execute(
+                        pg_insert(UserAnswer.__table__).values(correct_short)
+                        .on_conflict_do_nothing(index_elements=['user_id', 'question_id'])
+                    )
+                if mcq_rows:
+                    stmt = pg_insert(MultipleChoiceAnswer.__table__).values(list(mcq_rows.values()))
+                    conn.execute(stmt.on_conflict_do_update(
+                        index_elements=['user_id', 'question_id'],
+                        set_={
+                            'user_choice': stmt.excluded.user_choice,
+                            'is_correct': stmt.excluded.is_correct,
+                            'answered_at': db.func.now()
+                        }
+                    ))
+                completed = recompute_lesson_progress(conn, user_id, lesson_id)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                # Ada soal yang sudah dihapus admin, kunci jawaban di cache worker ini masih lama
+                forget_answer_keys(lesson_id)
+                return jsonify({'status': 'error', 'message': 'Soal tidak ditemukan.'})
+
+        return jsonify({'status': 'ok', 'completed': bool(completed), 'results': results})
+
+    except Exception as e:
+        print("❌ Database Error di submit_answers:", e)
+        return jsonify({'status': 'error', 'message': 'Terjadi kesalahan database.'}), 500
+
+
+# ---------------------------------------------
+# 7. SUBMIT FORMULIR KONTAK (BARU)
 # ---------------------------------------------
 @main_bp.route('/contact', methods=['POST'])
 def contact_submit():
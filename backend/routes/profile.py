@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, redirect, url_for, session, flash
-from backend.models import User, Progress, Lesson
+from sqlalchemy.orm import joinedload
+from backend.models import User, Progress
 
 profile_bp = Blueprint('profile', __name__, template_folder='../../frontend/templates')
 
@@ -10,9 +11,16 @@ def profile():
         flash('Silakan login terlebih dahulu','warning')
         return redirect(url_for('auth.login'))
     user = User.query.get_or_404(user_id)
-    progresses = Progress.query.filter_by(user_id=user_id).all()
-    lessons_done = []
-    for p in progresses:
-        lesson = Lesson.query.get(p.lesson_id)
-        lessons_done.append({'lesson': lesson, 'score': p.score, 'completed': p.completed})
+    # Progress + Lesson dimuat dalam satu query JOIN (bukan satu query Lesson per baris)
+    progresses = (
+        Progress.query
+        .options(joinedload(Progress.lesson))
+        .filter_by(user_id=user_id)
+        .order_by(Progress.lesson_id)
+        .all()
+    )
+    lessons_done = [
+        {'lesson': p.lesson, 'score': p.score, 'completed': p.completed}
+        for p in progresses if not p.lesson.deleting
+    ]
     return render_template('profile.html', user=user, lessons=lessons_done)
@@ -0,0 +1,324 @@
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import shutil
+from flask import request, send_from_directory, abort, url_for
+
+# ---------------------------------------------
+# PIPELINE ASET STATIS (HASH, KOMPRESI, GAMBAR TURUNAN)
+# ---------------------------------------------
+# `flask build-assets` (atau ASSETS_BUILD_ON_START=1) membaca frontend/static dan menulis
+# frontend/static/dist/:
+#   - salinan setiap file dengan hash isi di namanya (style.1a2b3c4d5e.css),
+#   - varian .gz dan .br (jika paket Brotli terpasang) untuk CSS/JS/SVG,
+#   - gambar turunan WebP/AVIF beberapa lebar (jika Pillow terpasang; AVIF butuh
+#     Pillow dengan libavif atau pillow-avif-plugin),
+#   - manifest.json yang memetakan nama asli -> nama ber-hash.
+# Saat runtime, url_for('static', filename='style.css') otomatis menghasilkan URL
+# ber-hash jika file ada di manifest, dan file di dist/ dikirim dengan cache 1 tahun
+# (immutable) serta varian terkompresi sesuai Accept-Encoding. Tanpa manifest,
+# semuanya kembali ke perilaku static Flask biasa.
+
+DIST_DIR = 'dist'
+MANIFEST_FILE = 'manifest.json'
+HASH_LENGTH = 10
+MAX_AGE = 365 * 24 * 3600
+
+COMPRESSIBLE = ('.css', '.js', '.svg')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+IMAGE_WIDTHS = (160, 480, 960, 1920)
+IMAGE_QUALITY = {'webp': 80, 'avif': 60}
+
+# Urutan <source> di <picture>: format paling kecil lebih dulu
+_IMAGE_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+_CSS_URL_RE = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+_CSS_DECLARATION_RE = re.compile(r"([\w-]+)(\s*:\s*)([^;{}]*url\([^;{}]*);")
+
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('image/webp', '.webp')
+
+
+def _content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def _hashed_name(rel_path, data, suffix=''):
+    stem, ext = os.path.splitext(rel_path)
+    return f"{stem}{suffix}.{_content_hash(data)}{ext}"
+
+
+def _write(dist, rel_path, data):
+    path = os.path.join(dist, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _image_encoders():
+    """Format gambar turunan yang bisa dibuat di lingkungan ini (Pillow opsional)."""
+    try:
+        from PIL import Image, ImageOps, features
+    except ImportError:
+        return None, []
+
+    formats = []
+    if features.check('avif'):
+        formats.append('avif')
+    else:
+        try:
+            import pillow_avif  # noqa: F401  (mendaftarkan encoder AVIF ke Pillow)
+            formats.append('avif')
+        except ImportError:
+            pass
+    if features.check('webp'):
+        formats.append('webp')
+    return (Image, ImageOps), formats
+
+
+def _build_variants(pil, formats, source_path, rel_path, dist):
+    Image, ImageOps = pil
+    variants = []
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'P') else 'RGB')
+
+        widths = [w for w in IMAGE_WIDTHS if w < image.width] + [min(image.width, IMAGE_WIDTHS[-1])]
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, fmt.upper(), quality=IMAGE_QUALITY[fmt])
+                data = buffer.getvalue()
+                name = _hashed_name(os.path.splitext(rel_path)[0] + f'.{fmt}', data, suffix=f'.{width}')
+                _write(dist, name, data)
+                variants.append({'width': width, 'type': _IMAGE_TYPES[fmt], 'file': name})
+    return variants
+
+
+def _rewrite_css(css, css_rel_path, files, variants):
+    """Mengganti url(...) di CSS dengan nama ber-hash; gambar dengan WebP/AVIF mendapat image-set()."""
+    base = os.path.dirname(css_rel_path)
+
+    def resolve(ref):
+        if ref.startswith(('data:', 'http:', 'https:', '//', '/')):
+            return None
+        return os.path.normpath(os.path.join(base, ref)).replace(os.sep, '/')
+
+    def relative(target):
+        return os.path.relpath(target, base or '.').replace(os.sep, '/')
+
+    def hashed_urls(value):
+        def replace(match):
+            source = resolve(match.group(2))
+            if source not in files:
+                return match.group(0)
+            return f"url('{relative(files[source])}')"
+        return _CSS_URL_RE.sub(replace, value)
+
+    def declaration(match):
+        prop, sep, value = match.groups()
+        fallback = f"{prop}{sep}{hashed_urls(value)};"
+
+        urls = _CSS_URL_RE.findall(value)
+        sources = [resolve(ref) for _, ref in urls]
+        if len(sources) != 1 or sources[0] not in variants or sources[0] not in files:
+            return fallback
+
+        # Varian terbesar per format; browser tanpa image-set() tetap memakai deklarasi fallback
+        best = {}
+        for variant in variants[sources[0]]:
+            if variant['width'] >= best.get(variant['type'], {}).get('width', 0):
+                best[variant['type']] = variant
+        mime = mimetypes.guess_type(sources[0])[0]
+        options = [f"url('{relative(best[t]['file'])}') type('{t}')" for t in _IMAGE_TYPES.values() if t in best]
+        options.append(f"url('{relative(files[sources[0]])}') type('{mime}')")
+        image_set = _CSS_URL_RE.sub(lambda m: f"image-set({', '.join(options)})", value, count=1)
+        return f"{fallback} {prop}{sep}{image_set};"
+
+    return _CSS_DECLARATION_RE.sub(declaration, css)
+
+
+def _compress(dist, rel_path, data):
+    encodings = []
+    _write(dist, rel_path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    encodings.append('gzip')
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    if brotli is not None:
+        _write(dist, rel_path + '.br', brotli.compress(data, quality=11))
+        encodings.append('br')
+    return encodings
+
+
+def build_assets(static_folder):
+    """
+    Membangun frontend/static/dist dari file sumber di static_folder.
+    Hasil dibangun di folder sementara lalu ditukar, sehingga worker yang sedang
+    berjalan tidak pernah melihat dist/ setengah jadi; file ber-hash dari build
+    sebelumnya ikut disimpan. Mengembalikan manifest.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    staging = f"{dist}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    sources = []
+    for root, dirs, names in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [d for d in dirs if not d.startswith(DIST_DIR)]
+        for name in names:
+            path = os.path.join(root, name)
+            sources.append(os.path.relpath(path, static_folder).replace(os.sep, '/'))
+
+    pil, formats = _image_encoders()
+    files, variants, compressed = {}, {}, {}
+
+    # Gambar dan file lain lebih dulu, CSS terakhir agar url() di dalamnya bisa ditulis ulang
+    for rel_path in sorted(sources, key=lambda p: p.endswith('.css')):
+        path = os.path.join(static_folder, rel_path)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if rel_path.endswith('.css'):
+            data = _rewrite_css(data.decode('utf-8'), rel_path, files, variants).encode('utf-8')
+
+        hashed = _hashed_name(rel_path, data)
+        _write(staging, hashed, data)
+        files[rel_path] = hashed
+
+        if rel_path.lower().endswith(COMPRESSIBLE):
+            compressed[hashed] = _compress(staging, hashed, data)
+        if pil is not None and formats and rel_path.lower().endswith(IMAGE_EXTENSIONS):
+            variants[rel_path] = _build_variants(pil, formats, path, rel_path, staging)
+
+    manifest = {'files': files, 'variants': variants, 'compressed': compressed}
+    with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    _keep_previous_build(dist, staging)
+
+    previous = f"{dist}.{os.getpid()}.old"
+    if os.path.exists(dist):
+        os.replace(dist, previous)
+    os.replace(staging, dist)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+def _manifest_outputs(manifest):
+    """Semua file di dist/ yang dirujuk manifest (file ber-hash, varian gambar, .gz/.br)."""
+    outputs = set(manifest.get('files', {}).values())
+    for variants in manifest.get('variants', {}).values():
+        outputs.update(variant['file'] for variant in variants)
+    for name, encodings in manifest.get('compressed', {}).items():
+        outputs.update(name + ('.br' if encoding == 'br' else '.gz') for encoding in encodings)
+    return outputs
+
+
+def _keep_previous_build(dist, staging):
+    """
+    Menyalin file dari build sebelumnya ke build baru. Worker yang masih memakai manifest
+    lama (dan browser yang masih menyimpan HTML lama) tetap bisa mengambil file ber-hash
+    lamanya. Hanya satu generasi yang disimpan, jadi dist/ tidak tumbuh terus.
+    """
+    previous = load_manifest(os.path.dirname(dist))
+    if previous is None:
+        return
+    for name in _manifest_outputs(previous):
+        source = os.path.join(dist, name)
+        target = os.path.join(staging, name)
+        if os.path.exists(source) and not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(source, target)
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class AssetPipeline:
+    """Manifest aset yang sedang dipakai + helper URL/template (app.extensions['assets'])."""
+
+    def __init__(self, app):
+        self.app = app
+        self.static_folder = app.static_folder
+        self.manifest = load_manifest(self.static_folder) or {}
+
+    @property
+    def files(self):
+        return self.manifest.get('files', {})
+
+    def reload(self):
+        self.manifest = load_manifest(self.static_folder) or {}
+
+    def hashed_static_url(self, endpoint, values):
+        """url_defaults: url_for('static', filename=...) -> file ber-hash di dist/."""
+        if endpoint == 'static':
+            hashed = self.files.get(values.get('filename'))
+            if hashed is not None:
+                values['filename'] = f"{DIST_DIR}/{hashed}"
+
+    def picture_sources(self, filename):
+        """Daftar {'type', 'srcset'} untuk elemen <source> di <picture> (kosong tanpa build)."""
+        by_type = {}
+        for variant in self.manifest.get('variants', {}).get(filename, []):
+            # url_for meng-escape nama file (spasi, dll.) agar srcset tetap valid
+            url = url_for('static', filename=f"{DIST_DIR}/{variant['file']}")
+            by_type.setdefault(variant['type'], []).append(f"{url} {variant['width']}w")
+        return [{'type': t, 'srcset': ', '.join(srcset)} for t, srcset in by_type.items()]
+
+    def serve(self, filename):
+        """View pengganti endpoint 'static': file di dist/ dikirim immutable + pre-compressed."""
+        prefix = f"{DIST_DIR}/"
+        if not filename.startswith(prefix):
+            return self.app.send_static_file(filename)
+
+        name = filename[len(prefix):]
+        if name == MANIFEST_FILE:
+            abort(404)
+
+        encodings = self.manifest.get('compressed', {}).get(name, [])
+        accepted = request.accept_encodings
+        chosen, suffix = None, ''
+        if 'br' in encodings and accepted['br']:
+            chosen, suffix = 'br', '.br'
+        elif 'gzip' in encodings and accepted['gzip']:
+            chosen, suffix = 'gzip', '.gz'
+
+        response = send_from_directory(
+            os.path.join(self.static_folder, DIST_DIR), name + suffix,
+            mimetype=mimetypes.guess_type(name)[0], max_age=MAX_AGE, conditional=True
+        )
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        if encodings:
+            response.vary.add('Accept-Encoding')
+        if chosen:
+            response.content_encoding = chosen
+        return response
+
+
+def init_assets(app):
+    """Memuat manifest aset (membangunnya dulu jika ASSETS_BUILD_ON_START) dan memasang helper."""
+    if app.config.get('ASSETS_BUILD_ON_START') and load_manifest(app.static_folder) is None:
+        build_assets(app.static_folder)
+
+    pipeline = AssetPipeline(app)
+    app.extensions['assets'] = pipeline
+    app.url_defaults(pipeline.hashed_static_url)
+    app.view_functions['static'] = pipeline.serve
+    app.jinja_env.globals['picture_sources'] = pipeline.picture_sources
+    return pipeline
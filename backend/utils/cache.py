@@ -0,0 +1,198 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# ---------------------------------------------
+# CACHE IN-PROCESS (LRU + TTL) DENGAN BACKEND BERSAMA OPSIONAL
+# ---------------------------------------------
+# Setiap worker gunicorn punya salinan LRU sendiri. Jika CACHE_URL diisi
+# (mis. redis://...), nilai juga disimpan di backend bersama sehingga worker lain
+# cukup membaca dari sana. Invalidasi menghapus di LRU lokal dan di backend bersama;
+# salinan LRU di worker lain paling lama basi selama `ttl` detik. Cache yang isinya
+# bergantung pada konten admin memakai get_versioned/set_versioned dengan versi konten
+# (utils/versions.py), sehingga perubahan admin langsung terlihat di semua worker.
+
+_MISSING = object()
+
+# Semua instance TTLCache, agar bisa dikonfigurasi dan dilaporkan bersama
+_registry = {}
+
+
+class LocalBackend:
+    """Backend bersama versi in-process (pengganti Redis untuk development dan test)."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, payload = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return payload
+
+    def set(self, key, payload, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, payload)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisBackend:
+    """Backend bersama berbasis Redis (paket `redis` hanya dibutuhkan jika dipakai)."""
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self._client.get(key)
+
+    def set(self, key, payload, ttl):
+        self._client.set(key, payload, ex=int(ttl))
+
+    def delete(self, key):
+        self._client.delete(key)
+
+
+class TTLCache:
+    """
+    LRU per proses dengan masa berlaku (TTL), invalidasi eksplisit, dan penghitung hit/miss.
+    shared=False: selalu lokal, tidak memakai backend bersama meskipun CACHE_URL diisi.
+    """
+
+    def __init__(self, name, maxsize=256, ttl=300, shared=True):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self.backend = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _registry[name] = self
+
+    def _shared_key(self, key):
+        return f"pylearn:{self.name}:{key}"
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at >= now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+        if self.backend is not None:
+            payload = self.backend.get(self._shared_key(key))
+            if payload is not None:
+                value = pickle.loads(payload)
+                self._store_local(key, value)
+                with self._lock:
+                    self.hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self._store_local(key, value)
+        if self.backend is not None:
+            self.backend.set(self._shared_key(key), pickle.dumps(value), self.ttl)
+
+    def _store_local(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_versioned(self, key, version, default=None):
+        """
+        Seperti get(), tetapi untuk entri yang disimpan dengan set_versioned(): entri dengan
+        versi lain (mis. versi konten sebelum admin mengubah data) dianggap miss dan dibuang
+        dari LRU lokal. Dengan ini worker lain ikut melihat invalidasi tanpa menunggu TTL.
+        """
+        item = self.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+        stored_version, value = item
+        if stored_version != version:
+            with self._lock:
+                self._data.pop(key, None)
+                self.hits -= 1
+                self.misses += 1
+            return default
+        return value
+
+    def set_versioned(self, key, value, version):
+        self.set(key, (version, value))
+
+    def get_or_load(self, key, loader):
+        """Read-through: ambil dari cache, atau panggil loader() lalu simpan hasilnya (None tidak disimpan)."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+        if self.backend is not None:
+            self.backend.delete(self._shared_key(key))
+
+    def clear(self):
+        """Mengosongkan LRU lokal (backend bersama dibiarkan kedaluwarsa sendiri)."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'shared_backend': type(self.backend).__name__ if self.backend else None
+            }
+
+
+def configure_cache(app):
+    """Mengatur backend bersama untuk semua cache berdasarkan app.config['CACHE_URL']."""
+    url = app.config.get('CACHE_URL')
+    if not url:
+        backend = None
+    elif url == 'local://':
+        backend = LocalBackend()
+    else:
+        backend = RedisBackend(url)
+
+    for cache in _registry.values():
+        cache.backend = backend if cache.shared else None
+        cache.clear()
+
+
+def cache_stats():
+    """Penghitung hit/miss untuk semua cache yang terdaftar."""
+    return [cache.stats() for cache in _registry.values()]
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+# ---------------------------------------------
+# KONFIGURASI POOL KONEKSI + TELEMETRI
+# ---------------------------------------------
+# Semua angka diambil dari environment variable agar bisa disesuaikan dengan jumlah
+# worker/thread gunicorn tanpa mengubah kode:
+#   DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (detik), DB_POOL_RECYCLE (detik),
+#   DB_POOL_PRE_PING (1/0), DB_STATEMENT_TIMEOUT_MS (0 = tanpa batas),
+#   DB_PGBOUNCER (1 = mode kompatibel PgBouncer transaction pooling).
+#
+# Satu request = satu koneksi: route memakai db.session (atau db.session.connection() untuk
+# SQL mentah), termasuk cek ETag, kunci jawaban, dan versi konten, sehingga DB_POOL_SIZE
+# sama dengan jumlah thread per worker sudah cukup. Pekerjaan panjang di luar request
+# (upload/delete job, import, export streaming) memakai db.engine sendiri.
+
+
+class PoolStats:
+    """Penghitung waktu tunggu checkout koneksi (per proses worker)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3)
+            }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool yang mencatat lama request menunggu koneksi dari pool."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - start)
+        return conn
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def engine_options_from_env(database_uri):
+    """Menyusun SQLALCHEMY_ENGINE_OPTIONS dari environment variable."""
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+    }
+
+    connect_args = {}
+    statement_timeout = _env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+    pgbouncer = os.environ.get('DB_PGBOUNCER') == '1'
+
+    if pgbouncer:
+        # PgBouncer (transaction pooling) tidak mendukung prepared statement di sisi server
+        # dan menolak parameter startup `options`. psycopg2 tidak memakai prepared statement;
+        # untuk driver psycopg (v3) cache-nya dimatikan secara eksplisit.
+        if database_uri.startswith('postgresql+psycopg://'):
+            connect_args['prepare_threshold'] = None
+    elif statement_timeout:
+        connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+
+    if connect_args:
+        options['connect_args'] = connect_args
+    return options
+
+
+def init_pool(engine):
+    """Memasang hook engine yang tidak bisa diatur lewat engine options."""
+    statement_timeout = _env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+
+    if os.environ.get('DB_PGBOUNCER') == '1' and statement_timeout:
+        # Di belakang PgBouncer, SET level sesi bisa bocor ke client lain,
+        # jadi batas waktu dipasang per transaksi.
+        @event.listens_for(engine, 'begin')
+        def set_statement_timeout(conn):
+            conn.exec_driver_sql(f'SET LOCAL statement_timeout = {statement_timeout}')
+
+
+def pool_status(engine):
+    """Status pool saat ini (per proses worker) untuk halaman /admin/pool-stats."""
+    pool = engine.pool
+    status = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+        })
+    status.update(pool_stats.snapshot())
+    return status
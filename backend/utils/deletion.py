@@ -0,0 +1,269 @@
+from sqlalchemy import text
+from backend.models import db
+from backend.utils.jobs import JobRunner, start_on_first_request
+from backend.utils.stats import refresh_module_stats
+from backend.utils.lessons import invalidate_lesson
+
+# ---------------------------------------------
+# HAPUS MODUL / PELAJARAN SECARA SET-BASED
+# ---------------------------------------------
+# Semua tabel anak (soal, jawaban, progress, stats) punya FOREIGN KEY ... ON DELETE CASCADE
+# dan relasi ORM-nya memakai passive_deletes=True, jadi satu DELETE pada baris induk
+# cukup: PostgreSQL yang menghapus anak-anaknya tanpa memuat apa pun ke session.
+#
+# Untuk modul/pelajaran dengan sangat banyak jawaban, satu DELETE berarti satu transaksi
+# panjang yang mengunci jutaan baris. Mode bertahap (chunked) menandai modul/pelajaran
+# sebagai `deleting` (langsung hilang dari halaman user), mencatat baris delete_jobs, lalu
+# runner di latar belakang menghapus jawaban dan progress per potongan dalam transaksi
+# pendek sebelum menghapus baris induknya. Job diambil dengan FOR UPDATE SKIP LOCKED dan
+# lease seperti upload job (utils/jobs.py); setiap langkahnya idempotent, jadi job yang
+# terputus (worker mati, deploy) cukup dijalankan ulang dari awal.
+
+CHUNK_SIZE = 5000
+
+
+def delete_lesson_rows(conn, lesson_id):
+    """Menghapus satu pelajaran (beserta isinya lewat cascade). Mengembalikan module_id atau None."""
+    module_id = conn.execute(
+        text("DELETE FROM lessons WHERE id = :lid RETURNING module_id"), {"lid": lesson_id}
+    ).scalar()
+    if module_id is not None:
+        refresh_module_stats(conn, module_id)
+    return module_id
+
+
+def delete_module_rows(conn, module_id):
+    """Menghapus satu modul beserta semua pelajarannya. Mengembalikan daftar id pelajaran yang terhapus."""
+    lesson_ids = conn.execute(
+        text("DELETE FROM lessons WHERE module_id = :mid RETURNING id"), {"mid": module_id}
+    ).scalars().all()
+    conn.execute(text("DELETE FROM modules WHERE id = :mid"), {"mid": module_id})
+    return lesson_ids
+
+
+def count_answer_rows(conn, lesson_ids, limit):
+    """
+    Jumlah baris jawaban + progress yang ikut terhapus, paling banyak `limit` (untuk memilih
+    mode bertahap). Query berhenti setelah `limit` baris, jadi biayanya tidak tumbuh
+    bersama ukuran modul.
+    """
+    if not lesson_ids:
+        return 0
+    return conn.execute(text("""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM user_answers ua
+            JOIN questions q ON q.id = ua.question_id
+            WHERE q.lesson_id = ANY(:lids)
+            UNION ALL
+            SELECT 1 FROM multiple_choice_answers mca
+            JOIN multiple_choice_questions mcq ON mcq.id = mca.question_id
+            WHERE mcq.lesson_id = ANY(:lids)
+            UNION ALL
+            SELECT 1 FROM progress WHERE lesson_id = ANY(:lids)
+            LIMIT :limit
+        ) s
+    """), {"lids": list(lesson_ids), "limit": limit}).scalar()
+
+
+def mark_deleting(conn, module_id=None, lesson_id=None):
+    """
+    Menandai modul (beserta semua pelajarannya) atau satu pelajaran sebagai `deleting`.
+    Skor maksimal modul di module_stats dihitung ulang tanpa pelajaran tersebut.
+    Mengembalikan daftar id pelajaran yang ditandai.
+    """
+    if module_id is not None:
+        conn.execute(text("UPDATE modules SET deleting = TRUE WHERE id = :mid"), {"mid": module_id})
+        return conn.execute(
+            text("UPDATE lessons SET deleting = TRUE WHERE module_id = :mid RETURNING id"), {"mid": module_id}
+        ).scalars().all()
+
+    owner = conn.execute(
+        text("UPDATE lessons SET deleting = TRUE WHERE id = :lid RETURNING module_id"), {"lid": lesson_id}
+    ).scalar()
+    if owner is None:
+        return []
+    refresh_module_stats(conn, owner)
+    return [lesson_id]
+
+
+CHUNK_DELETES = (
+    """
+    DELETE FROM user_answers WHERE id IN (
+        SELECT ua.id FROM user_answers ua
+        JOIN questions q ON q.id = ua.question_id
+        WHERE q.lesson_id = :lid LIMIT :n
+    )
+    """,
+    """
+    DELETE FROM multiple_choice_answers WHERE id IN (
+        SELECT mca.id FROM multiple_choice_answers mca
+        JOIN multiple_choice_questions mcq ON mcq.id = mca.question_id
+        WHERE mcq.lesson_id = :lid LIMIT :n
+    )
+    """,
+    """
+    DELETE FROM progress WHERE id IN (
+        SELECT id FROM progress WHERE lesson_id = :lid LIMIT :n
+    )
+    """,
+)
+
+
+def _drain_lesson(engine, lesson_id, chunk_size, on_chunk):
+    for sql in CHUNK_DELETES:
+        while True:
+            with engine.begin() as conn:
+                deleted = conn.execute(text(sql), {"lid": lesson_id, "n": chunk_size}).rowcount
+            on_chunk()
+            if deleted < chunk_size:
+                break
+
+
+def delete_in_chunks(engine, module_id=None, lesson_id=None, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Menghapus modul (module_id) atau satu pelajaran (lesson_id) secara bertahap:
+    target ditandai `deleting`, jawaban dan progress dihapus per `chunk_size` baris dalam
+    transaksi terpisah, lalu baris induk dihapus dengan DELETE biasa (sisa cascade-nya
+    sudah kecil). `on_chunk()` dipanggil setelah setiap potongan (mis. memperpanjang lease).
+    Aman dijalankan ulang setelah terputus. Mengembalikan daftar id pelajaran yang terhapus.
+    """
+    with engine.begin() as conn:
+        lesson_ids = mark_deleting(conn, module_id=module_id, lesson_id=lesson_id)
+    invalidate_lesson(*lesson_ids)
+
+    for lid in lesson_ids:
+        _drain_lesson(engine, lid, chunk_size, on_chunk or (lambda: None))
+
+    with engine.begin() as conn:
+        if module_id is not None:
+            lesson_ids = delete_module_rows(conn, module_id)
+        else:
+            lesson_ids = [lesson_id] if delete_lesson_rows(conn, lesson_id) is not None else []
+
+    invalidate_lesson(*lesson_ids)
+    return lesson_ids
+
+
+# ---------------------------------------------
+# ANTRIAN DELETE JOB
+# ---------------------------------------------
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 30
+LEASE_SECONDS = 5 * 60  # Diperpanjang setiap potongan selesai
+
+_UTC_NOW = "(now() AT TIME ZONE 'utc')"
+
+
+def enqueue_delete(conn, target, target_id, title):
+    """
+    Menandai target sebagai `deleting` dan mencatat delete job di transaksi yang sama.
+    Mengembalikan id job, atau None jika target ini sudah punya job yang masih aktif.
+    """
+    if target == 'module':
+        mark_deleting(conn, module_id=target_id)
+    else:
+        mark_deleting(conn, lesson_id=target_id)
+
+    return conn.execute(text(f"""
+        INSERT INTO delete_jobs (target, target_id, title, status, attempts,
+                                 next_attempt_at, created_at, updated_at)
+        VALUES (:target, :tid, :title, 'pending', 0, {_UTC_NOW}, {_UTC_NOW}, {_UTC_NOW})
+        ON CONFLICT (target, target_id) WHERE status IN ('pending', 'running') DO NOTHING
+        RETURNING id
+    """), {"target": target, "tid": target_id, "title": title}).scalar()
+
+
+def delete_job_states(conn, target):
+    """Status job terakhir per target yang belum selesai ({target_id: {'status', 'last_error'}}) untuk halaman admin."""
+    rows = conn.execute(text("""
+        SELECT DISTINCT ON (target_id) target_id, status, last_error
+        FROM delete_jobs
+        WHERE target = :target
+        ORDER BY target_id, id DESC
+    """), {"target": target}).mappings().all()
+    return {row['target_id']: dict(row) for row in rows if row['status'] != 'done'}
+
+
+class DeleteJobRunner(JobRunner):
+    """Runner untuk tabel delete_jobs (satu job berjalan per proses)."""
+
+    label = 'delete-job'
+
+    def __init__(self, app, chunk_size=CHUNK_SIZE, max_workers=1):
+        super().__init__(app, max_workers)
+        self.chunk_size = chunk_size
+
+    def claim(self):
+        with db.engine.begin() as conn:
+            row = conn.execute(text(f"""
+                UPDATE delete_jobs SET
+                    status = 'running',
+                    attempts = attempts + 1,
+                    locked_until = {_UTC_NOW} + make_interval(secs => :lease),
+                    updated_at = {_UTC_NOW}
+                WHERE id = (
+                    SELECT id FROM delete_jobs
+                    WHERE (status = 'pending' AND next_attempt_at <= {_UTC_NOW})
+                       OR (status = 'running' AND locked_until < {_UTC_NOW})
+                    ORDER BY next_attempt_at
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, target, target_id, attempts
+            """), {"lease": LEASE_SECONDS}).mappings().first()
+        return dict(row) if row else None
+
+    def _extend_lease(self, job_id):
+        with db.engine.begin() as conn:
+            conn.execute(text(f"""
+                UPDATE delete_jobs SET
+                    locked_until = {_UTC_NOW} + make_interval(secs => :lease),
+                    updated_at = {_UTC_NOW}
+                WHERE id = :id
+            """), {"id": job_id, "lease": LEASE_SECONDS})
+
+    def run_job(self, job):
+        target = {'module_id' if job['target'] == 'module' else 'lesson_id': job['target_id']}
+        try:
+            delete_in_chunks(db.engine, chunk_size=self.chunk_size,
+                             on_chunk=lambda: self._extend_lease(job['id']), **target)
+        except Exception as e:
+            self._record_failure(job, e)
+            return
+
+        with db.engine.begin() as conn:
+            conn.execute(text(f"""
+                UPDATE delete_jobs SET status = 'done', locked_until = NULL, last_error = NULL,
+                    updated_at = {_UTC_NOW}
+                WHERE id = :id
+            """), {"id": job['id']})
+
+    def _record_failure(self, job, error):
+        # Target tetap `deleting` (tersembunyi); admin bisa menekan "Hapus" lagi untuk job baru
+        final = job['attempts'] >= MAX_ATTEMPTS
+        self.app.logger.warning("Delete job %s percobaan %s gagal: %s", job['id'], job['attempts'], error)
+
+        with db.engine.begin() as conn:
+            conn.execute(text(f"""
+                UPDATE delete_jobs SET
+                    status = :status,
+                    last_error = :error,
+                    locked_until = NULL,
+                    next_attempt_at = {_UTC_NOW} + make_interval(secs => :delay),
+                    updated_at = {_UTC_NOW}
+                WHERE id = :id
+            """), {
+                "id": job['id'],
+                "status": 'failed' if final else 'pending',
+                "error": str(error),
+                "delay": BACKOFF_SECONDS * 2 ** (job['attempts'] - 1),
+            })
+
+
+def init_delete_jobs(app):
+    """Membuat DeleteJobRunner untuk app (disimpan di app.extensions['delete_jobs'])."""
+    runner = DeleteJobRunner(app)
+    app.extensions['delete_jobs'] = runner
+    if app.config.get('DELETE_JOBS_AUTOSTART', True):
+        start_on_first_request(app, runner)
+    return runner
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import text
+
+# ---------------------------------------------
+# EXPORT DATA BERUKURAN BESAR (STREAMING)
+# ---------------------------------------------
+# Baris dibaca dengan server-side cursor (stream_results + yield_per) dan langsung
+# ditulis ke response, sehingga memori worker tetap konstan berapa pun jumlah barisnya.
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+BATCH_SIZE = 1000
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_query(engine, sql, fmt, params=None):
+    """Generator yang menghasilkan hasil query sebagai potongan CSV atau NDJSON."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=BATCH_SIZE).execute(
+            text(sql), params or {}
+        )
+        columns = list(result.keys())
+
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for rows in result.partitions():
+                writer.writerows(
+                    [value.isoformat() if isinstance(value, datetime) else value for value in row]
+                    for row in rows
+                )
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for rows in result.partitions():
+                yield ''.join(
+                    json.dumps(dict(zip(columns, row)), default=_json_default) + '\n'
+                    for row in rows
+                )
+
+
+PROGRESS_EXPORT_SQL = """
+    SELECT p.user_id, u.email, p.lesson_id, l.title AS lesson_title,
+           p.score, p.correct_count, p.completed, p.last_update
+    FROM progress p
+    JOIN users u ON u.id = p.user_id
+    JOIN lessons l ON l.id = p.lesson_id
+    ORDER BY p.user_id, p.lesson_id
+"""
+
+ANSWERS_EXPORT_SQL = """
+    SELECT 'short' AS question_type, ua.user_id, q.lesson_id, ua.question_id,
+           NULL AS user_choice, TRUE AS is_correct, ua.answered_at
+    FROM user_answers ua
+    JOIN questions q ON q.id = ua.question_id
+    UNION ALL
+    SELECT 'mcq' AS question_type, mca.user_id, mcq.lesson_id, mca.question_id,
+           mca.user_choice, mca.is_correct, mca.answered_at
+    FROM multiple_choice_answers mca
+    JOIN multiple_choice_questions mcq ON mcq.id = mca.question_id
+"""
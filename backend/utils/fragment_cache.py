@@ -0,0 +1,56 @@
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from backend.utils.cache import TTLCache
+from backend.utils.versions import current_content_version
+
+# ---------------------------------------------
+# FRAGMENT CACHE UNTUK TEMPLATE JINJA
+# ---------------------------------------------
+# Pemakaian di template:
+#
+#   {% cache ['lesson-body', lesson['id']], content_version() %} ... {% endcache %}
+#
+# `key` boleh berupa string atau list; SEMUA nilai request/session yang memengaruhi isi
+# fragmen (mis. request.endpoint, status login) wajib ikut di key. `version` opsional;
+# isi dengan content_version() untuk fragmen yang bergantung pada konten admin, sehingga
+# fragmen lama otomatis tidak terpakai lagi di semua worker setelah admin mengubah konten
+# (entri lama tersingkir sendiri dari LRU). Fragmen disimpan per proses (tidak pernah di
+# backend bersama) dan kedaluwarsa setelah `ttl` detik sebagai batas aman.
+
+fragment_cache = TTLCache('fragment', maxsize=1024, ttl=3600, shared=False)
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=fragment_cache)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        version = parser.parse_expression() if parser.stream.skip_if('comma') else nodes.Const(None)
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [key, version]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, version, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+
+        cache_key = (repr(key), version)
+        html = cache.get(cache_key)
+        if html is None:
+            html = str(caller())
+            cache.set(cache_key, html)
+        return Markup(html)
+
+
+def init_fragment_cache(app):
+    """Memasang tag {% cache %} dan global content_version() di Jinja app (FRAGMENT_CACHE=0 menonaktifkan)."""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if not app.config.get('FRAGMENT_CACHE', True):
+        app.jinja_env.fragment_cache = None
+    app.jinja_env.globals['content_version'] = current_content_version
@@ -1,9 +1,11 @@
+import json
 import os
 import pickle
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+import threading
+
+# SDK Google (googleapiclient, google.auth, google_auth_oauthlib, httplib2) diimport di dalam
+# fungsi: modul ini boleh diimport di mana saja tanpa menambah waktu start worker.
+# `flask check-import-time` memastikan SDK tersebut tidak ikut termuat saat backend.app diimport.
 
 # --- KONSTANTA ---
 # Scope izin untuk akses Drive (hanya untuk file yang dibuat atau diotorisasi)
@@ -17,63 +19,180 @@ TOKEN_FILE = 'credentials/token.pickle'
 # ID folder tujuan di Google Drive Anda
 DRIVE_FOLDER_ID = '10PcUcuwPovZu0TZMuobKkf4_oyOk0A-k'  # Ganti dengan Folder ID Anda yang benar
 
+# Ukuran chunk upload resumable (harus kelipatan 256 KB)
+CHUNK_SIZE = 5 * 1024 * 1024
 
-def get_drive_service():
-    """Autentikasi dan bangun koneksi ke Google Drive API."""
-    creds = None
 
-    # 1. Muat token yang sudah ada dari file
+# Client Drive dan kredensial di-cache per proses. httplib2.Http tidak thread-safe,
+# jadi setiap thread (mis. thread pool upload job) memakai objek Http sendiri,
+# sedangkan discovery document dan kredensial dipakai bersama.
+_lock = threading.Lock()
+_creds = None
+_service = None
+_service_creds = None
+_local = threading.local()
+
+
+def _load_token():
     if os.path.exists(TOKEN_FILE):
         with open(TOKEN_FILE, 'rb') as token:
-            creds = pickle.load(token)
-
-    # 2. Cek validitas: Jika token tidak valid, coba refresh
-    if not creds or not creds.valid:
+            return pickle.load(token)
+    return None
+
+
+def _save_token(creds):
+    # Tulis ke file sementara lalu rename, agar proses lain tidak membaca token setengah jadi
+    os.makedirs(os.path.dirname(TOKEN_FILE), exist_ok=True)
+    tmp_file = f"{TOKEN_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'wb') as token:
+        pickle.dump(creds, token)
+    os.replace(tmp_file, TOKEN_FILE)
+
+
+def get_credentials():
+    """Kredensial OAuth yang valid. Refresh dijaga lock; token hanya disimpan jika berubah."""
+    global _creds
+    creds = _creds
+    if creds is not None and creds.valid:
+        return creds
+
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    with _lock:
+        # 1. Muat token yang sudah ada dari file (sekali per proses)
+        if _creds is None:
+            _creds = _load_token()
+        creds = _creds
+        if creds is not None and creds.valid:
+            return creds  # Sudah di-refresh oleh thread lain selagi menunggu lock
+
+        # 2. Token akses kedaluwarsa, coba perbarui menggunakan Refresh Token
         if creds and creds.expired and creds.refresh_token:
-            # Token Akses kedaluwarsa, coba perbarui menggunakan Refresh Token
             print("⏳ Token Akses Kadaluarsa. Mencoba untuk me-refresh otomatis...")
+            old_token = creds.token
             try:
                 creds.refresh(Request())
+                if creds.token != old_token:
+                    _save_token(creds)
                 print("✅ Token berhasil di-refresh.")
             except Exception as e:
-                 # Jika Refresh Token gagal (dicabut/hilang), paksa otorisasi ulang
-                 print(f"❌ Refresh token gagal ({e}). Otorisasi ulang diperlukan.")
-                 creds = None 
-                 
+                # Jika Refresh Token gagal (dicabut/hilang), paksa otorisasi ulang
+                print(f"❌ Refresh token gagal ({e}). Otorisasi ulang diperlukan.")
+                creds = None
+
         if not creds or not creds.valid:
             # 3. Otorisasi ulang jika tidak ada kredensial valid
             print("🔑 Memulai Otorisasi Baru untuk mendapatkan Refresh Token persisten...")
             flow = InstalledAppFlow.from_client_secrets_file(
                 CREDENTIALS_FILE, SCOPES)
-            
+
             # KUNCI SOLUSI: Menambahkan access_type='offline'
-            creds = flow.run_local_server(port=0, access_type='offline') 
-            
+            creds = flow.run_local_server(port=0, access_type='offline')
+
             # Simpan token baru, yang KINI berisi Refresh Token persisten
-            os.makedirs(os.path.dirname(TOKEN_FILE), exist_ok=True)
-            with open(TOKEN_FILE, 'wb') as token:
-                pickle.dump(creds, token)
+            _save_token(creds)
             print("✅ Otorisasi berhasil dan token baru (persisten) disimpan.")
 
-    # 4. Bangun service Google Drive
-    return build('drive', 'v3', credentials=creds)
+        _creds = creds
+        return creds
 
 
-def upload_to_drive(file_path, filename):
-    """Upload file PDF ke folder Google Drive dan buat public URL."""
-    # Akan memanggil get_drive_service() dan memastikan token valid
-    service = get_drive_service() 
+def get_drive_service():
+    """Client Google Drive API, dibangun sekali per proses dari discovery document statis (tanpa akses jaringan)."""
+    global _service, _service_creds
+    from googleapiclient.discovery import build
+
+    creds = get_credentials()
+    if _service is None or _service_creds is not creds:
+        with _lock:
+            if _service is None or _service_creds is not creds:
+                _service = build('drive', 'v3', credentials=creds,
+                                 static_discovery=True, cache_discovery=False)
+                _service_creds = creds
+    return _service
+
+
+def _thread_http(creds):
+    """Objek HTTP terautentikasi milik thread ini (dipakai ulang antar upload)."""
+    http = getattr(_local, 'http', None)
+    if http is None or http.credentials is not creds:
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        http = AuthorizedHttp(creds, http=httplib2.Http())
+        _local.http = http
+    return http
+
+
+def _resumable_status(http, resume_uri, size):
+    """
+    Menanyakan posisi sesi upload resumable ke Drive (PUT kosong, protokol resumable Drive).
+    Mengembalikan (byte_diterima, None) jika upload belum selesai, (None, file_id) jika
+    sudah selesai, atau (None, None) jika sesi sudah kedaluwarsa (404/410).
+    """
+    from googleapiclient.errors import HttpError
+
+    resp, content = http.request(resume_uri, 'PUT', headers={
+        'Content-Range': f'bytes */{size}', 'Content-Length': '0'
+    })
+    if resp.status == 308:
+        # Header Range berbentuk "bytes=0-N"; tanpa header berarti belum ada byte diterima
+        received = resp.get('range')
+        return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+    if resp.status in (200, 201):
+        return None, json.loads(content)['id']
+    if resp.status in (404, 410):
+        return None, None
+    raise HttpError(resp, content, uri=resume_uri)
+
+
+def upload_to_drive(file_path, filename, resume_uri=None, on_progress=None):
+    """
+    Upload file PDF ke folder Google Drive (resumable, per CHUNK_SIZE) dan buat public URL.
+    `resume_uri` : URI sesi resumable dari percobaan sebelumnya, untuk melanjutkan upload
+                   yang terputus (mis. worker restart) dari byte terakhir yang diterima Drive.
+    `on_progress(fraksi, resume_uri)` : dipanggil setelah setiap chunk terkirim.
+    """
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import MediaFileUpload
+
+    # Client yang sama dipakai ulang; kredensial di-refresh hanya jika kedaluwarsa
+    service = get_drive_service()
+    http = _thread_http(get_credentials())
 
     # Metadata file
     file_metadata = {'name': filename, 'parents': [DRIVE_FOLDER_ID]}
-    media = MediaFileUpload(file_path, mimetype='application/pdf')
+    media = MediaFileUpload(file_path, mimetype='application/pdf', resumable=True, chunksize=CHUNK_SIZE)
 
-    # Upload file
-    uploaded_file = service.files().create(
+    # Upload file per chunk
+    upload = service.files().create(
         body=file_metadata,
         media_body=media,
         fields='id'
-    ).execute()
+    )
+    uploaded_file = None
+    if resume_uri:
+        # Tanyakan posisi terakhir ke Drive lalu lanjutkan dari byte tersebut
+        received, file_id = _resumable_status(http, resume_uri, media.size())
+        if file_id is not None:
+            uploaded_file = {'id': file_id}  # Chunk terakhir sudah diterima sebelum terputus
+        elif received is None:
+            # Sesi resumable sudah kedaluwarsa di sisi Drive: mulai dari awal
+            return upload_to_drive(file_path, filename, on_progress=on_progress)
+        else:
+            upload.resumable_uri = resume_uri
+            upload.resumable_progress = received
+
+    while uploaded_file is None:
+        try:
+            status, uploaded_file = upload.next_chunk(http=http, num_retries=3)
+        except HttpError as e:
+            if resume_uri and e.resp.status in (404, 410):
+                # Sesi resumable sudah kedaluwarsa di sisi Drive: mulai dari awal
+                return upload_to_drive(file_path, filename, on_progress=on_progress)
+            raise
+        if status is not None and on_progress is not None:
+            on_progress(status.progress(), upload.resumable_uri)
 
     file_id = uploaded_file.get('id')
 
@@ -81,9 +200,9 @@ def upload_to_drive(file_path, filename):
     service.permissions().create(
         fileId=file_id,
         body={'type': 'anyone', 'role': 'reader'}
-    ).execute()
+    ).execute(http=http, num_retries=3)
 
     print(f"✅ File berhasil diupload: {filename}")
     print(f"🔗 https://drive.google.com/file/d/{file_id}/preview")
 
-    return file_id
\ No newline at end of file
+    return file_id
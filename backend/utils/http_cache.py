@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import zlib
+from functools import wraps
+from flask import current_app, make_response, request, session
+from sqlalchemy.exc import SQLAlchemyError
+from backend.models import db
+from backend.utils.versions import data_versions, remember_content_version
+
+# ---------------------------------------------
+# KOMPRESI RESPONSE + CONDITIONAL GET (ETAG / 304)
+# ---------------------------------------------
+# Kompresi : response HTML/JSON (dan ekspor CSV/NDJSON) di atas HTTP_COMPRESS_MIN_SIZE byte
+#            dikompresi brotli (jika paket Brotli terpasang) atau gzip sesuai Accept-Encoding.
+#            Response streaming dikompresi per potongan, jadi tetap mengalir ke klien.
+#            File (send_file) dan aset yang sudah pre-compressed tidak disentuh.
+# ETag     : view yang diberi @conditional_page mendapat weak ETag dari versi data
+#            (versi konten + versi progres user, lihat utils/versions.py) dan identitas
+#            session. Jika If-None-Match cocok, 304 dikirim SEBELUM view dijalankan,
+#            sehingga query halaman dan render template dilewati. Semua cache yang dipakai
+#            view (lesson_cache, answer_key_cache, {% cache %}) divalidasi dengan versi konten
+#            yang sama, jadi isi halaman tidak pernah lebih lama dari versi di ETag-nya.
+#            Halaman tanpa data (@conditional_page(versions=False)) tidak perlu query sama sekali.
+
+COMPRESS_MIMETYPES = {'text/html', 'application/json', 'text/csv', 'application/x-ndjson'}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Kualitas 11 terlalu lambat untuk konten dinamis
+
+_brotli = None
+
+
+def _brotli_module():
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+        except ImportError:
+            brotli = False
+        _brotli = brotli
+    return _brotli or None
+
+
+def _choose_encoding(accepted):
+    if accepted['br'] and _brotli_module() is not None:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compressor(encoding):
+    """Fungsi (compress, flush, finish) kompresor untuk encoding yang dipilih."""
+    if encoding == 'br':
+        compressor = _brotli_module().Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = format gzip
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def _compress_stream(encoding, chunks, charset='utf-8'):
+    compress, flush, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(charset)
+            # Flush per potongan agar klien menerima data tanpa menunggu buffer kompresor penuh
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def compress_response(response):
+    """after_request: kompresi response teks sesuai Accept-Encoding."""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or request.method == 'HEAD'
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(encoding, response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config['HTTP_COMPRESS_MIN_SIZE']:
+            return response
+        compress, _, finish = _compressor(encoding)
+        response.set_data(compress(data) + finish())
+
+    response.content_encoding = encoding
+    # Isi berbeda per encoding, jadi ETag kuat tidak boleh dipakai ulang apa adanya
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def page_etag(content_version, progress_version):
+    """Weak ETag untuk halaman: URL, identitas session, versi data, dan versi build aplikasi."""
+    parts = (
+        current_app.config['APP_BUILD_ID'],
+        request.full_path,
+        session.get('user_id'),
+        session.get('user_name'),
+        session.get('is_admin'),
+        content_version,
+        progress_version.isoformat() if progress_version else None,
+    )
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def _revalidate(response):
+    # Browser boleh menyimpan halaman, tapi wajib bertanya ulang (If-None-Match) setiap kali
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def conditional_page(view=None, *, versions=True):
+    """
+    Decorator view halaman: menjawab If-None-Match dengan 304 tanpa menjalankan view
+    jika versi data belum berubah. Request dengan flash message yang belum ditampilkan
+    selalu dirender ulang. versions=False untuk halaman yang hanya bergantung pada
+    session dan versi build (tanpa query versi data).
+    """
+    if view is None:
+        return lambda v: conditional_page(v, versions=versions)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+            return view(*args, **kwargs)
+
+        content_version = progress_version = None
+        if versions:
+            try:
+                # Koneksi db.session yang sama dipakai lagi oleh view (satu koneksi per request)
+                content_version, progress_version = data_versions(db.session.connection(), session.get('user_id'))
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                current_app.logger.warning("Versi data untuk ETag tidak bisa dibaca: %s", e)
+                return view(*args, **kwargs)
+
+            # Dibaca SEBELUM view memuat data; dipakai ulang oleh cache data dan {% cache %}
+            remember_content_version(content_version)
+        etag = page_etag(content_version, progress_version)
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag, weak=True)
+            return _revalidate(response)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and '_flashes' not in session:
+            response.set_etag(etag, weak=True)
+            _revalidate(response)
+        return response
+
+    return wrapper
+
+
+def _build_id(app):
+    """
+    Versi build untuk ETag: commit deploy (APP_VERSION/Render/Heroku) jika ada, selain itu
+    hash isi template, kode backend, dan manifest aset. Sama di semua worker dan bertahan
+    setelah restart selama kodenya tidak berubah.
+    """
+    for name in ('APP_VERSION', 'RENDER_GIT_COMMIT', 'SOURCE_VERSION'):
+        if os.environ.get(name):
+            return os.environ[name]
+
+    digest = hashlib.sha1()
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for root_dir, suffix in ((app.template_folder, '.html'), (backend_dir, '.py')):
+        for root, dirs, names in os.walk(root_dir):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            for name in sorted(names):
+                if name.endswith(suffix):
+                    path = os.path.join(root, name)
+                    digest.update(os.path.relpath(path, root_dir).encode('utf-8'))
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+
+    assets = app.extensions.get('assets')
+    if assets is not None:
+        digest.update(json.dumps(assets.files, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def init_http_cache(app):
+    """Memasang kompresi response (jika HTTP_COMPRESS aktif) dan versi build untuk ETag halaman."""
+    app.config.setdefault('APP_BUILD_ID', _build_id(app))
+    if app.config.get('HTTP_COMPRESS', True):
+        app.after_request(compress_response)
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+# ---------------------------------------------
+# ANGGARAN WAKTU IMPORT (START WORKER)
+# ---------------------------------------------
+# Mengukur `import backend.app` di proses Python baru dengan `-X importtime`.
+# Dipakai oleh `flask check-import-time` (exit code 1 jika melewati anggaran) sehingga
+# bisa dijalankan di CI. Catatan: create_app() ikut terukur, termasuk satu query cek
+# versi skema, jadi jalankan dengan database lokal/CI agar angkanya stabil.
+
+# SDK berat yang hanya boleh dimuat saat pertama kali dipakai (lihat utils/google_drive.py,
+# utils/jobs.py, utils/cache.py)
+LAZY_MODULES = (
+    'googleapiclient',
+    'google_auth_oauthlib',
+    'google_auth_httplib2',
+    'google.auth',
+    'google.oauth2',
+    'httplib2',
+    'redis',
+)
+
+DEFAULT_BUDGET_MS = 1500
+
+
+def measure_import(module='backend.app'):
+    """
+    Mengimport `module` di subprocess dengan -X importtime.
+    Mengembalikan (total_ms, {nama_modul: kumulatif_ms}).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=os.environ.copy(), check=True,
+    )
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # Baris header
+        modules[parts[2].strip()] = int(parts[1]) / 1000
+    return modules.get(module, 0.0), modules
+
+
+def eager_heavy_modules(modules):
+    """Modul di LAZY_MODULES yang ternyata ikut termuat saat import."""
+    return sorted(
+        name for name in modules
+        if any(name == lazy or name.startswith(lazy + '.') for lazy in LAZY_MODULES)
+    )
@@ -0,0 +1,250 @@
+import csv
+import io
+import json
+import re
+from sqlalchemy import text
+from backend.models import Question, MultipleChoiceQuestion
+from backend.utils.progress import recompute_progress
+from backend.utils.stats import refresh_lesson_stats
+from backend.utils.lessons import invalidate_lesson
+
+# ---------------------------------------------
+# IMPORT SOAL MASSAL (CSV / JSON)
+# ---------------------------------------------
+# Satu baris = satu soal. Kolom:
+#   type           : 'short' (isian singkat) atau 'mcq' (pilihan ganda)
+#   lesson_id      : id pelajaran tujuan
+#   question       : teks pertanyaan
+#   answer         : jawaban benar (khusus 'short')
+#   option_a..d    : pilihan jawaban (khusus 'mcq')
+#   correct_option : A/B/C/D (khusus 'mcq')
+#   points         : opsional, default 10
+# File dibaca bertahap (CSV/NDJSON per baris, array JSON per elemen); baris yang tidak
+# valid dilaporkan dan dilewati. Soal valid dikumpulkan sampai BATCH_SIZE lalu disisipkan
+# dengan executemany dalam SATU transaksi per batch (gagal di satu batch tidak membatalkan
+# yang lain), jadi memori tidak bergantung pada ukuran file. Setelah semua batch,
+# statistik, progress, dan cache tiap pelajaran yang bertambah soalnya diperbarui sekali.
+
+IMPORT_FORMATS = ('csv', 'json')
+
+BATCH_SIZE = 500
+READ_CHUNK = 64 * 1024           # Ukuran baca array JSON
+MAX_JSON_ITEM = 1024 * 1024      # Satu elemen array JSON tidak boleh lebih besar dari ini
+
+_WHITESPACE = re.compile(r'\s*')
+
+_MCQ_OPTIONS = ('option_a', 'option_b', 'option_c', 'option_d')
+
+
+def iter_import_rows(stream, fmt):
+    """
+    Membaca file import (stream biner) secara bertahap.
+    Menghasilkan (nomor_baris, dict). Format 'json' menerima array JSON atau NDJSON.
+    """
+    if fmt == 'csv':
+        # newline='' agar csv menangani baris baru di dalam kolom ber-kutip sendiri
+        reader = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        # Nomor baris 1 adalah header
+        for number, row in enumerate(csv.DictReader(reader), start=2):
+            yield number, row
+        return
+
+    reader = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    first = reader.read(1)
+    while first and first.isspace():
+        first = reader.read(1)
+
+    if first == '[':
+        yield from _iter_json_array(reader)
+        return
+
+    for number, line in enumerate(_prepend(first, reader), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, e
+
+
+def _iter_json_array(reader):
+    """
+    Mengurai array JSON elemen demi elemen (setelah '[' dibaca) tanpa memuat seluruh file.
+    Kesalahan sintaks dilaporkan sebagai JSONDecodeError pada elemen berikutnya, lalu
+    pembacaan berhenti (sisa array tidak bisa diurai dengan andal).
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+    number = 0
+    expect_value = True  # Setelah '[' atau ','; sebaliknya menunggu ',' atau ']'
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = reader.read(READ_CHUNK)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                yield number + 1, json.JSONDecodeError("array JSON tidak ditutup dengan ']'", buffer, pos)
+                return
+            fill()
+            continue
+
+        char = buffer[pos]
+        if not expect_value:
+            if char == ']':
+                return
+            if char != ',':
+                yield number + 1, json.JSONDecodeError("diharapkan ',' atau ']'", buffer, pos)
+                return
+            pos += 1
+            expect_value = True
+            continue
+        if char == ']' and number == 0:
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # Elemen mungkin terpotong di batas chunk: baca lagi sampai batas ukuran elemen
+            if not eof and len(buffer) - pos < MAX_JSON_ITEM:
+                fill()
+                continue
+            yield number + 1, e
+            return
+        if end == len(buffer) and not eof:
+            # Angka di akhir buffer bisa saja belum lengkap
+            fill()
+            continue
+
+        number += 1
+        yield number, item
+        pos = end
+        expect_value = False
+
+
+def _prepend(first, reader):
+    first_line = first + reader.readline()
+    yield first_line
+    yield from reader
+
+
+def _required(row, field):
+    value = row.get(field)
+    if value is None or not str(value).strip():
+        raise ValueError(f"kolom '{field}' wajib diisi")
+    return str(value).strip()
+
+
+def validate_row(row, lesson_ids):
+    """
+    Memeriksa satu baris import. Mengembalikan (tipe, nilai_kolom) atau melempar
+    ValueError dengan pesan yang bisa ditampilkan ke admin.
+    """
+    if isinstance(row, Exception):
+        raise ValueError(f"JSON tidak valid: {row}")
+    if not isinstance(row, dict):
+        raise ValueError("baris harus berupa objek")
+
+    kind = str(row.get('type') or '').strip().lower()
+    if kind not in ('short', 'mcq'):
+        raise ValueError("kolom 'type' harus 'short' atau 'mcq'")
+
+    lesson_id = _required(row, 'lesson_id')
+    try:
+        lesson_id = int(lesson_id)
+    except ValueError:
+        raise ValueError("kolom 'lesson_id' harus angka")
+    if lesson_id not in lesson_ids:
+        raise ValueError(f"pelajaran {lesson_id} tidak ditemukan")
+
+    points = row.get('points')
+    try:
+        points = int(points) if points not in (None, '') else 10
+    except (TypeError, ValueError):
+        raise ValueError("kolom 'points' harus angka")
+    if points < 0:
+        raise ValueError("kolom 'points' tidak boleh negatif")
+
+    values = {'lesson_id': lesson_id, 'question': _required(row, 'question'), 'points': points}
+
+    if kind == 'short':
+        values['answer'] = _required(row, 'answer')
+        if len(values['answer']) > 255:
+            raise ValueError("kolom 'answer' maksimal 255 karakter")
+    else:
+        for option in _MCQ_OPTIONS:
+            values[option] = _required(row, option)
+            if len(values[option]) > 500:
+                raise ValueError(f"kolom '{option}' maksimal 500 karakter")
+        values['correct_option'] = _required(row, 'correct_option').upper()
+        if values['correct_option'] not in ('A', 'B', 'C', 'D'):
+            raise ValueError("kolom 'correct_option' harus A, B, C, atau D")
+
+    return kind, values
+
+
+def _insert_batches(conn, table, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        conn.execute(table.insert(), rows[start:start + BATCH_SIZE])
+
+
+def _insert_batch(engine, batch, inserted, lessons, errors):
+    """Menyisipkan satu batch soal valid dalam satu transaksi lalu mengosongkannya."""
+    if not batch['rows']:
+        return
+    try:
+        with engine.begin() as conn:
+            _insert_batches(conn, Question.__table__, batch['short'])
+            _insert_batches(conn, MultipleChoiceQuestion.__table__, batch['mcq'])
+    except Exception as e:
+        first, last = batch['rows'][0], batch['rows'][-1]
+        errors.append({'row': None, 'error': f"baris {first}-{last}: {len(batch['rows'])} soal gagal disimpan ({e})"})
+    else:
+        inserted['short'] += len(batch['short'])
+        inserted['mcq'] += len(batch['mcq'])
+        for values in batch['short'] + batch['mcq']:
+            lessons.setdefault(values['lesson_id'], None)
+    for key in batch:
+        batch[key] = []
+
+
+def import_questions(engine, rows):
+    """
+    Memvalidasi dan menyisipkan soal dari iter_import_rows() per BATCH_SIZE baris.
+    Setelah semua batch: lesson_stats/module_stats tiap pelajaran yang bertambah soalnya
+    diperbarui, progress learner dihitung ulang, dan cache pelajaran diinvalidasi.
+    Mengembalikan laporan {'inserted': {...}, 'lessons': [...], 'errors': [...]}.
+    """
+    with engine.connect() as conn:
+        lesson_ids = set(conn.execute(text("SELECT id FROM lessons")).scalars())
+
+    batch = {'short': [], 'mcq': [], 'rows': []}
+    inserted = {'short': 0, 'mcq': 0}
+    lessons = {}  # dict agar urutan pelajaran sesuai kemunculan di file
+    errors = []
+    for number, row in rows:
+        try:
+            kind, values = validate_row(row, lesson_ids)
+        except ValueError as e:
+            errors.append({'row': number, 'error': str(e)})
+            continue
+        batch[kind].append(values)
+        batch['rows'].append(number)
+        if len(batch['rows']) >= BATCH_SIZE:
+            _insert_batch(engine, batch, inserted, lessons, errors)
+    _insert_batch(engine, batch, inserted, lessons, errors)
+
+    for lesson_id in lessons:
+        try:
+            with engine.begin() as conn:
+                refresh_lesson_stats(conn, lesson_id)
+                recompute_progress(conn, lesson_id)
+        except Exception as e:
+            errors.append({'row': None, 'error': f"pelajaran {lesson_id}: statistik/progress gagal diperbarui ({e})"})
+        invalidate_lesson(lesson_id)
+
+    return {'inserted': inserted, 'lessons': list(lessons), 'errors': errors}
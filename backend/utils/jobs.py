@@ -0,0 +1,305 @@
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import text
+from backend.models import db, UploadJob
+from backend.utils.lessons import invalidate_lesson
+
+# ---------------------------------------------
+# ANTRIAN JOB UPLOAD PDF (DI LUAR REQUEST)
+# ---------------------------------------------
+# add_lesson hanya menyimpan file ke UPLOAD_FOLDER/jobs, membuat Lesson dengan
+# pdf_status='pending', dan mencatat baris upload_jobs. Thread dispatcher per proses
+# mengambil job yang jatuh tempo (FOR UPDATE SKIP LOCKED, aman untuk banyak worker
+# gunicorn) lalu menjalankannya di thread pool. Job yang gagal dicoba ulang dengan
+# backoff eksponensial; job yang macet karena worker mati diambil lagi setelah
+# `locked_until` lewat dan melanjutkan sesi upload resumable-nya (resumable_uri) dari
+# byte terakhir yang diterima Drive. Semua waktu disimpan dalam UTC (sama dengan
+# datetime.utcnow di model).
+#
+# File sementara ada di disk lokal host yang menerima upload, jadi job dicatat dengan
+# host itu (staged_on, UPLOAD_STAGING_HOST atau hostname) dan hanya diambil oleh host yang
+# sama. Job yang tidak disentuh host asalnya selama ORPHAN_SECONDS (host sudah hilang,
+# mis. setelah autoscale turun) boleh diambil host lain; file yang tidak ada di host lain
+# dicatat sebagai kegagalan biasa (dicoba ulang), bukan kegagalan final.
+
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 30     # 30s, 60s, 120s, 240s
+LEASE_SECONDS = 15 * 60  # Batas waktu satu percobaan upload sebelum job dianggap macet
+POLL_INTERVAL = 5
+ORPHAN_SECONDS = 60 * 60  # Setelah ini job dari host lain boleh diambil
+
+_UTC_NOW = "(now() AT TIME ZONE 'utc')"
+
+
+class FakeDriveClient:
+    """Pengganti Google Drive untuk test dan development (UPLOAD_FAKE_DRIVE=1)."""
+
+    def __init__(self, fail_times=0):
+        self.fail_times = fail_times
+        self.uploads = []
+        self._lock = threading.Lock()
+
+    def upload(self, file_path, filename, resume_uri=None, on_progress=None):
+        with self._lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise IOError('Fake Drive: gagal sementara')
+            file_id = f'fake-{len(self.uploads) + 1}'
+            self.uploads.append({'id': file_id, 'filename': filename, 'size': os.path.getsize(file_path),
+                                 'resumed': resume_uri is not None})
+        if on_progress is not None:
+            on_progress(1.0, None)
+        return file_id
+
+
+def drive_upload(file_path, filename, resume_uri=None, on_progress=None):
+    """Upload ke Google Drive sungguhan (SDK Google hanya diimport saat dibutuhkan)."""
+    from backend.utils.google_drive import upload_to_drive
+    return upload_to_drive(file_path, filename, resume_uri=resume_uri, on_progress=on_progress)
+
+
+def drive_preview_url(file_id):
+    return f"https://drive.google.com/file/d/{file_id}/preview"
+
+
+def staging_host(app):
+    """Nama host yang menyimpan file staging upload (UPLOAD_STAGING_HOST atau hostname)."""
+    return app.config.get('UPLOAD_STAGING_HOST') or socket.gethostname()
+
+
+def enqueue_upload(session, lesson_id, file_path, filename):
+    """Mencatat job upload di transaksi yang sama dengan pembuatan Lesson."""
+    job = UploadJob(lesson_id=lesson_id, file_path=file_path, filename=filename,
+                    staged_on=staging_host(current_app))
+    session.add(job)
+    session.flush()
+    return job
+
+
+class JobRunner:
+    """
+    Dispatcher + thread pool untuk satu tabel job. Subclass mengisi claim() (mengambil satu
+    job yang jatuh tempo dengan FOR UPDATE SKIP LOCKED, atau None) dan run_job(job).
+    """
+
+    label = 'job'
+
+    def __init__(self, app, max_workers=2):
+        self.app = app
+        self.max_workers = max_workers
+        self._executor = None
+        self._slots = threading.Semaphore(max_workers)
+        self._wakeup = threading.Event()
+        self._start_lock = threading.Lock()
+        self._started = False
+
+    # --- Siklus hidup ---------------------------------------------------
+
+    def ensure_started(self):
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.label)
+            threading.Thread(target=self._dispatch_loop, name=f'{self.label}-dispatcher', daemon=True).start()
+            self._started = True
+
+    def wake(self):
+        """Membangunkan dispatcher setelah job baru di-commit."""
+        self.ensure_started()
+        self._wakeup.set()
+
+    def _dispatch_loop(self):
+        while True:
+            with self.app.app_context():
+                while self._slots.acquire(blocking=False):
+                    try:
+                        job = self.claim()
+                    except Exception as e:
+                        self.app.logger.error("Gagal mengambil %s: %s", self.label, e)
+                        job = None
+                    if job is None:
+                        self._slots.release()
+                        break
+                    self._executor.submit(self._run_in_slot, job)
+            self._wakeup.wait(POLL_INTERVAL)
+            self._wakeup.clear()
+
+    def _run_in_slot(self, job):
+        try:
+            with self.app.app_context():
+                self.run_job(job)
+        except Exception as e:
+            self.app.logger.error("%s %s gagal diproses: %s", self.label, job['id'], e)
+        finally:
+            self._slots.release()
+            self._wakeup.set()
+
+    def run_pending(self):
+        """Menjalankan semua job yang jatuh tempo secara sinkron (CLI / test). Mengembalikan jumlah job."""
+        processed = 0
+        while True:
+            job = self.claim()
+            if job is None:
+                return processed
+            self.run_job(job)
+            processed += 1
+
+    def claim(self):
+        raise NotImplementedError
+
+    def run_job(self, job):
+        raise NotImplementedError
+
+
+def start_on_first_request(app, runner):
+    """
+    Dispatcher dimulai pada request pertama, sehingga perintah CLI tidak ikut memprosesnya
+    dan job yang tertunda sebelum restart tetap dilanjutkan.
+    """
+    @app.before_request
+    def start_job_runner():
+        runner.ensure_started()
+
+
+class UploadJobRunner(JobRunner):
+    """
+    Runner untuk tabel upload_jobs.
+    `upload(file_path, filename, resume_uri=None, on_progress=None)` mengembalikan file id Drive.
+    """
+
+    label = 'upload-job'
+
+    def __init__(self, app, upload=None, max_workers=2):
+        super().__init__(app, max_workers)
+        self.upload = upload or drive_upload
+        self.host = staging_host(app)
+
+    # --- Satu job -------------------------------------------------------
+
+    def claim(self):
+        with db.engine.begin() as conn:
+            row = conn.execute(text(f"""
+                UPDATE upload_jobs SET
+                    status = 'running',
+                    attempts = attempts + 1,
+                    locked_until = {_UTC_NOW} + make_interval(secs => :lease),
+                    updated_at = {_UTC_NOW}
+                WHERE id = (
+                    SELECT id FROM upload_jobs
+                    WHERE ((status = 'pending' AND next_attempt_at <= {_UTC_NOW})
+                        OR (status = 'running' AND locked_until < {_UTC_NOW}))
+                      AND (staged_on IS NULL OR staged_on = :host
+                           OR COALESCE(locked_until, next_attempt_at)
+                              < {_UTC_NOW} - make_interval(secs => :orphan))
+                    ORDER BY next_attempt_at
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, lesson_id, file_path, filename, attempts, resumable_uri, staged_on
+            """), {"lease": LEASE_SECONDS, "host": self.host, "orphan": ORPHAN_SECONDS}).mappings().first()
+        return dict(row) if row else None
+
+    def _report_progress(self, job_id, fraction, resumable_uri):
+        # Sekaligus memperpanjang klaim: upload besar yang masih berjalan tidak dianggap macet
+        with db.engine.begin() as conn:
+            conn.execute(text(f"""
+                UPDATE upload_jobs SET
+                    progress = :progress,
+                    resumable_uri = COALESCE(:uri, resumable_uri),
+                    locked_until = {_UTC_NOW} + make_interval(secs => :lease),
+                    updated_at = {_UTC_NOW}
+                WHERE id = :id
+            """), {"id": job_id, "progress": fraction, "uri": resumable_uri, "lease": LEASE_SECONDS})
+
+    def run_job(self, job):
+        def on_progress(fraction, resumable_uri):
+            self._report_progress(job['id'], fraction, resumable_uri)
+
+        try:
+            file_id = self.upload(job['file_path'], job['filename'],
+                                  resume_uri=job['resumable_uri'], on_progress=on_progress)
+        except Exception as e:
+            self._record_failure(job, e)
+            return
+
+        with db.engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE lessons SET pdf_url = :url, pdf_status = 'ready' WHERE id = :lid
+            """), {"url": drive_preview_url(file_id), "lid": job['lesson_id']})
+            conn.execute(text(f"""
+                UPDATE upload_jobs SET status = 'done', progress = 1, resumable_uri = NULL,
+                    locked_until = NULL, last_error = NULL, updated_at = {_UTC_NOW}
+                WHERE id = :id
+            """), {"id": job['id']})
+
+        invalidate_lesson(job['lesson_id'])
+        try:
+            os.remove(job['file_path'])
+        except FileNotFoundError:
+            pass
+
+    def _record_failure(self, job, error):
+        # File yang hilang dari disk host asalnya tidak akan berhasil dengan dicoba ulang; di host
+        # lain (job yatim atau job lama tanpa staged_on) file mungkin masih ada di host asal
+        missing_here = isinstance(error, FileNotFoundError) and job['staged_on'] == self.host
+        final = job['attempts'] >= MAX_ATTEMPTS or missing_here
+        self.app.logger.warning("Upload job %s percobaan %s gagal: %s", job['id'], job['attempts'], error)
+
+        with db.engine.begin() as conn:
+            conn.execute(text(f"""
+                UPDATE upload_jobs SET
+                    status = :status,
+                    last_error = :error,
+                    locked_until = NULL,
+                    next_attempt_at = {_UTC_NOW} + make_interval(secs => :delay),
+                    updated_at = {_UTC_NOW}
+                WHERE id = :id
+            """), {
+                "id": job['id'],
+                "status": 'failed' if final else 'pending',
+                "error": str(error),
+                "delay": BACKOFF_SECONDS * 2 ** (job['attempts'] - 1),
+            })
+            if final:
+                conn.execute(text("UPDATE lessons SET pdf_status = 'failed' WHERE id = :lid"),
+                             {"lid": job['lesson_id']})
+
+        if final:
+            invalidate_lesson(job['lesson_id'])
+
+
+def init_upload_jobs(app):
+    """Membuat UploadJobRunner untuk app (disimpan di app.extensions['upload_jobs'])."""
+    upload = FakeDriveClient().upload if app.config.get('UPLOAD_FAKE_DRIVE') else None
+    runner = UploadJobRunner(app, upload, app.config.get('UPLOAD_WORKERS', 2))
+    app.extensions['upload_jobs'] = runner
+
+    if app.config.get('UPLOAD_JOBS_AUTOSTART', True):
+        start_on_first_request(app, runner)
+
+    return runner
+
+
+def job_status(job_id):
+    """Status satu job upload untuk endpoint /admin/upload-jobs/<id>."""
+    job = db.session.get(UploadJob, job_id)
+    if job is None:
+        return None
+    return {
+        'id': job.id,
+        'lesson_id': job.lesson_id,
+        'filename': job.filename,
+        'status': job.status,
+        'progress': round(job.progress or 0.0, 3),
+        'attempts': job.attempts,
+        'max_attempts': MAX_ATTEMPTS,
+        'last_error': job.last_error,
+        'next_attempt_at': job.next_attempt_at.isoformat() if job.next_attempt_at else None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'updated_at': job.updated_at.isoformat() if job.updated_at else None,
+    }
@@ -0,0 +1,201 @@
+from sqlalchemy import text
+from backend.utils.cache import TTLCache
+from backend.utils.versions import (CONTENT_VERSION_SQL, bump_content_version, current_content_version,
+                                    known_content_version, remember_content_version)
+
+# Konten pelajaran + daftar soal hanya berubah lewat admin routes, jadi aman di-cache.
+# Admin routes wajib memanggil invalidate_lesson() setelah commit (juga untuk kunci jawaban).
+# Entri disimpan bersama versi konten (utils/versions.py) yang dibaca SEBELUM data dimuat;
+# setelah admin menaikkan versi, entri lama di worker mana pun dianggap miss.
+lesson_cache = TTLCache('lesson', maxsize=512, ttl=600)
+
+_CONTENT_COLUMNS = """
+    to_jsonb(l) AS lesson,
+    COALESCE((
+        SELECT jsonb_agg(to_jsonb(q) ORDER BY q.id)
+        FROM questions q WHERE q.lesson_id = l.id
+    ), '[]'::jsonb) AS questions,
+    COALESCE((
+        SELECT jsonb_agg(to_jsonb(mcq) ORDER BY mcq.id)
+        FROM multiple_choice_questions mcq WHERE mcq.lesson_id = l.id
+    ), '[]'::jsonb) AS mcqs
+"""
+
+_ANSWER_STATE_COLUMNS = """
+    COALESCE((
+        SELECT jsonb_agg(ua.question_id)
+        FROM user_answers ua
+        JOIN questions q ON q.id = ua.question_id
+        WHERE ua.user_id = :uid AND q.lesson_id = l.id
+    ), '[]'::jsonb) AS answered_short,
+    COALESCE((
+        SELECT jsonb_agg(jsonb_build_object(
+            'question_id', mca.question_id,
+            'user_choice', mca.user_choice,
+            'is_correct', mca.is_correct
+        ))
+        FROM multiple_choice_answers mca
+        JOIN multiple_choice_questions mcq ON mcq.id = mca.question_id
+        WHERE mca.user_id = :uid AND mcq.lesson_id = l.id
+    ), '[]'::jsonb) AS answered_mcq
+"""
+
+# Query lengkap (cache miss) dan query status jawaban saja (konten dari lesson_cache).
+# Juga diperiksa oleh `flask check-query-plans` (utils/query_plans.py).
+LESSON_DETAIL_SQL = f"""
+    SELECT {_CONTENT_COLUMNS}, {_ANSWER_STATE_COLUMNS}, {CONTENT_VERSION_SQL} AS content_version
+    FROM lessons l
+    WHERE l.id = :lid AND NOT l.deleting
+"""
+
+LESSON_ANSWER_STATE_SQL = f"""
+    SELECT {_ANSWER_STATE_COLUMNS}
+    FROM lessons l
+    WHERE l.id = :lid AND NOT l.deleting
+"""
+
+
+def load_lesson_detail(conn, lesson_id, user_id):
+    """
+    Memuat pelajaran, soal isian singkat, soal pilihan ganda, dan status jawaban user
+    dalam SATU query (satu round trip ke database). Jika konten pelajaran sudah ada di
+    lesson_cache, query hanya mengambil status jawaban user. Jika versi konten belum
+    diketahui (request tanpa @conditional_page), versi ikut dibaca di query yang sama.
+    Mengembalikan None jika pelajaran tidak ditemukan, atau dict berisi:
+    lesson, questions, mcqs, answered_ids_short (set), answered_mcqs_map (dict).
+    """
+    version = known_content_version()
+    content = lesson_cache.get_versioned(lesson_id, version) if version is not None else None
+
+    if content is None:
+        row = conn.execute(text(LESSON_DETAIL_SQL), {"uid": user_id, "lid": lesson_id}).mappings().first()
+
+        if not row:
+            return None
+
+        if version is None:
+            version = row['content_version']
+            remember_content_version(version)
+        content = {'lesson': row['lesson'], 'questions': row['questions'], 'mcqs': row['mcqs']}
+        lesson_cache.set_versioned(lesson_id, content, version)
+    else:
+        row = conn.execute(text(LESSON_ANSWER_STATE_SQL), {"uid": user_id, "lid": lesson_id}).mappings().first()
+
+        if not row:
+            # Pelajaran sudah (sedang) dihapus di worker lain sebelum cache kedaluwarsa
+            lesson_cache.invalidate(lesson_id)
+            return None
+
+    return {
+        **content,
+        'answered_ids_short': set(row['answered_short']),
+        'answered_mcqs_map': {
+            a['question_id']: {'choice': a['user_choice'], 'correct': a['is_correct']}
+            for a in row['answered_mcq']
+        }
+    }
+
+
+# ---------------------------------------------
+# INDEX KUNCI JAWABAN (untuk check_answer / submit_mcq_answer)
+# ---------------------------------------------
+# answer_key_cache : lesson_id -> {'short': {qid: kunci}, 'mcq': {qid: kunci}}
+# question_lesson_cache : (tipe, qid) -> lesson_id (soal tidak pernah pindah pelajaran)
+answer_key_cache = TTLCache('answer_key', maxsize=512, ttl=600)
+question_lesson_cache = TTLCache('question_lesson', maxsize=8192, ttl=3600)
+
+_QUESTION_TABLES = {'short': 'questions', 'mcq': 'multiple_choice_questions'}
+
+
+def answer_keys_sql(kind=None):
+    """
+    Query kunci jawaban semua soal satu pelajaran: per :lid, atau (kind diisi) per
+    pelajaran milik soal :qid bertipe tersebut.
+    """
+    if kind is None:
+        lesson_filter = ":lid"
+    else:
+        lesson_filter = f"(SELECT lesson_id FROM {_QUESTION_TABLES[kind]} WHERE id = :qid)"
+    return f"""
+        SELECT 'short' AS kind, id, lesson_id, answer AS answer_key, points
+        FROM questions WHERE lesson_id = {lesson_filter}
+        UNION ALL
+        SELECT 'mcq' AS kind, id, lesson_id, correct_option AS answer_key, points
+        FROM multiple_choice_questions WHERE lesson_id = {lesson_filter}
+    """
+
+
+def _load_answer_keys(conn, sql, params, version):
+    rows = conn.execute(text(sql), params).mappings().all()
+
+    keys_by_lesson = {}
+    for row in rows:
+        keys = keys_by_lesson.setdefault(row['lesson_id'], {'short': {}, 'mcq': {}})
+        if row['kind'] == 'short':
+            key = {'lesson_id': row['lesson_id'], 'answer': row['answer_key'].strip().lower(),
+                   'points': row['points'] or 0}
+        else:
+            key = {'lesson_id': row['lesson_id'], 'correct_option': row['answer_key'].strip().upper(),
+                   'points': row['points'] or 0}
+        keys[row['kind']][row['id']] = key
+        question_lesson_cache.set((row['kind'], row['id']), row['lesson_id'])
+
+    for lesson_id, keys in keys_by_lesson.items():
+        answer_key_cache.set_versioned(lesson_id, keys, version)
+    return keys_by_lesson
+
+
+def get_answer_key(connection, kind, question_id):
+    """
+    Mengambil kunci jawaban satu soal ('short' atau 'mcq') dari cache.
+    Pada cache miss, semua kunci jawaban di pelajaran soal tersebut dimuat dengan satu query.
+    `connection` hanya dipanggil saat miss, misalnya `db.session.connection` (koneksi yang
+    sama yang nanti dipakai request untuk menyimpan jawaban).
+    Mengembalikan None jika soal tidak ditemukan.
+    """
+    version = current_content_version()
+    lesson_id = question_lesson_cache.get((kind, question_id))
+    if lesson_id is not None:
+        keys = answer_key_cache.get_versioned(lesson_id, version)
+        # Soal yang belum ada di cache (baru ditambah di worker lain) memicu muat ulang
+        if keys is not None and question_id in keys[kind]:
+            return keys[kind][question_id]
+
+    conn = connection()
+    if lesson_id is not None:
+        keys_by_lesson = _load_answer_keys(conn, answer_keys_sql(), {"lid": lesson_id}, version)
+    else:
+        keys_by_lesson = _load_answer_keys(conn, answer_keys_sql(kind), {"qid": question_id}, version)
+
+    for keys in keys_by_lesson.values():
+        if question_id in keys[kind]:
+            return keys[kind][question_id]
+    return None
+
+
+def get_lesson_answer_keys(connection, lesson_id):
+    """Semua kunci jawaban satu pelajaran: {'short': {qid: kunci}, 'mcq': {qid: kunci}}."""
+    version = current_content_version()
+    keys = answer_key_cache.get_versioned(lesson_id, version)
+    if keys is None:
+        keys = _load_answer_keys(connection(), answer_keys_sql(), {"lid": lesson_id}, version).get(lesson_id)
+    return keys or {'short': {}, 'mcq': {}}
+
+
+def forget_answer_keys(lesson_id):
+    """
+    Membuang kunci jawaban satu pelajaran tanpa menaikkan versi konten. Dipakai jalur
+    jawaban saat soal ternyata sudah dihapus (FOREIGN KEY gagal) sebelum versi terbaca.
+    """
+    answer_key_cache.invalidate(int(lesson_id))
+
+
+def invalidate_lesson(*lesson_ids):
+    """
+    Hook invalidasi untuk admin routes setelah konten/soal pelajaran berubah.
+    Juga menaikkan versi konten sehingga ETag halaman di semua worker ikut berubah.
+    """
+    for lesson_id in lesson_ids:
+        lesson_cache.invalidate(int(lesson_id))
+        answer_key_cache.invalidate(int(lesson_id))
+    bump_content_version()
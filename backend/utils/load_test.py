@@ -0,0 +1,126 @@
+import http.cookiejar
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# ---------------------------------------------
+# LOAD TEST SEDERHANA (TANPA DEPENDENSI TAMBAHAN)
+# ---------------------------------------------
+# Dipakai oleh `flask load-test` untuk membandingkan profil worker gunicorn
+# (gunicorn.conf.py, GUNICORN_WORKER_CLASS=gthread/gevent) terhadap server yang sedang
+# berjalan. Setiap klien virtual login sebagai user yang sama, lalu memanggil endpoint
+# secara bergantian selama `duration` detik. Jawaban MCQ ditulis ke database (upsert
+# pada baris yang sama), jadi pakai user khusus load test, bukan user sungguhan.
+
+PERCENTILES = (50, 95, 99)
+
+
+def lesson_request(lesson_id):
+    return ('GET /lessons/<id>', 'GET', f'/lessons/{lesson_id}', None)
+
+
+def mcq_request(question_id, choice='A'):
+    body = json.dumps({'question_id': question_id, 'user_choice': choice}).encode('utf-8')
+    return ('POST /submit_mcq_answer', 'POST', '/submit_mcq_answer', body)
+
+
+class _Client:
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def login(self, email, password):
+        form = urllib.parse.urlencode({'email': email, 'password': password}).encode('utf-8')
+        with self.opener.open(f"{self.base_url}/auth/login", data=form, timeout=self.timeout) as response:
+            response.read()
+        if not any(cookie.name == 'session' for cookie in self.cookies):
+            raise RuntimeError('Login load test gagal: cookie session tidak diterima.')
+
+    def send(self, method, path, body):
+        request = urllib.request.Request(f"{self.base_url}{path}", data=body, method=method)
+        if body is not None:
+            request.add_header('Content-Type', 'application/json')
+        request.add_header('Accept-Encoding', 'gzip')
+        with self.opener.open(request, timeout=self.timeout) as response:
+            response.read()
+            return response.status
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def run_load_test(base_url, requests, email, password, concurrency=16, duration=30.0, timeout=30.0):
+    """
+    Menjalankan `concurrency` klien selama `duration` detik. `requests` adalah daftar
+    (label, method, path, body), misalnya dari lesson_request() / mcq_request().
+    Mengembalikan {label: {'requests', 'errors', 'rps', 'p50_ms', 'p95_ms', 'p99_ms'}}.
+    """
+    latencies = {label: [] for label, *_ in requests}
+    errors = {label: 0 for label, *_ in requests}
+    lock = threading.Lock()
+    window = {}
+
+    def start_clock():
+        # Dijalankan sekali saat semua klien sudah login; waktu diukur mulai dari sini
+        window['started'] = time.monotonic()
+        window['deadline'] = window['started'] + duration
+
+    ready = threading.Barrier(concurrency + 1, action=start_clock)
+
+    def worker(offset):
+        client = _Client(base_url, timeout)
+        login_error = None
+        try:
+            client.login(email, password)
+        except Exception as e:
+            login_error = e
+        ready.wait()
+        if login_error is not None:
+            with lock:
+                for label in errors:
+                    errors[label] += 1
+            return
+
+        i = offset
+        while time.monotonic() < window['deadline']:
+            label, method, path, body = requests[i % len(requests)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                ok = client.send(method, path, body) == 200
+            except (urllib.error.URLError, OSError):
+                ok = False
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                if ok:
+                    latencies[label].append(elapsed)
+                else:
+                    errors[label] += 1
+
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - window['started']
+
+    report = {}
+    for label, values in latencies.items():
+        values.sort()
+        report[label] = {
+            'requests': len(values),
+            'errors': errors[label],
+            'rps': round(len(values) / elapsed, 1),
+            **{f'p{pct}_ms': round(_percentile(values, pct), 1) for pct in PERCENTILES},
+        }
+    return report
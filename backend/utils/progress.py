@@ -0,0 +1,164 @@
+from sqlalchemy import text
+
+# ---------------------------------------------
+# PROGRESS ENGINE
+# ---------------------------------------------
+# Mode delta  : dipakai di jalur jawaban (check_answer / submit_mcq_answer), hanya
+#               menerapkan perubahan skor & jumlah benar dari SATU jawaban dan membaca
+#               total soal dari lesson_stats. Cukup satu statement.
+# Mode penuh  : menghitung ulang semuanya dari tabel jawaban, untuk perbaikan data
+#               (repair) dan verifikasi hasil mode delta.
+
+
+def apply_progress_delta(conn, user_id, lesson_id, score_delta, correct_delta):
+    """
+    Menerapkan perubahan dari satu jawaban ke baris progress (upsert).
+    Mengembalikan status completed terbaru.
+    """
+    return conn.execute(text("""
+        WITH t AS (
+            SELECT COALESCE((
+                SELECT question_count + mcq_count FROM lesson_stats WHERE lesson_id = :lid
+            ), 0) AS total
+        )
+        INSERT INTO progress (user_id, lesson_id, score, correct_count, completed, last_update)
+        SELECT :uid, :lid, GREATEST(:dscore, 0), GREATEST(:dcorrect, 0),
+               t.total > 0 AND GREATEST(:dcorrect, 0) >= t.total, NOW()
+        FROM t
+        ON CONFLICT (user_id, lesson_id) DO UPDATE SET
+            score = COALESCE(progress.score, 0) + :dscore,
+            correct_count = COALESCE(progress.correct_count, 0) + :dcorrect,
+            completed = (SELECT total FROM t) > 0
+                AND COALESCE(progress.correct_count, 0) + :dcorrect >= (SELECT total FROM t),
+            last_update = NOW()
+        RETURNING completed
+    """), {
+        "uid": user_id,
+        "lid": lesson_id,
+        "dscore": score_delta,
+        "dcorrect": correct_delta
+    }).scalar()
+
+
+# Skor, jumlah benar, dan total soal yang dihitung langsung dari tabel jawaban & soal
+def _recompute_select(uid, lid):
+    return f"""
+    SELECT
+        COALESCE((
+            SELECT SUM(q.points)
+            FROM user_answers ua
+            JOIN questions q ON ua.question_id = q.id
+            WHERE ua.user_id = {uid} AND q.lesson_id = {lid}
+        ), 0) +
+        COALESCE((
+            SELECT SUM(mcq.points)
+            FROM multiple_choice_answers mca
+            JOIN multiple_choice_questions mcq ON mca.question_id = mcq.id
+            WHERE mca.user_id = {uid} AND mcq.lesson_id = {lid} AND mca.is_correct = TRUE
+        ), 0) AS score,
+        (
+            SELECT COUNT(*)
+            FROM user_answers ua
+            JOIN questions q ON ua.question_id = q.id
+            WHERE ua.user_id = {uid} AND q.lesson_id = {lid}
+        ) +
+        (
+            SELECT COUNT(*)
+            FROM multiple_choice_answers mca
+            JOIN multiple_choice_questions mcq ON mca.question_id = mcq.id
+            WHERE mca.user_id = {uid} AND mcq.lesson_id = {lid} AND mca.is_correct = TRUE
+        ) AS correct,
+        (SELECT COUNT(*) FROM questions WHERE lesson_id = {lid}) +
+        (SELECT COUNT(*) FROM multiple_choice_questions WHERE lesson_id = {lid}) AS total
+    """
+
+
+def recompute_lesson_progress(conn, user_id, lesson_id):
+    """
+    Mode penuh: menghitung ulang total skor dan status completed untuk Lesson,
+    berdasarkan kedua tipe soal (Question dan MCQ). Mengembalikan status completed.
+    """
+    return conn.execute(text(f"""
+        INSERT INTO progress (user_id, lesson_id, score, correct_count, completed, last_update)
+        SELECT :uid, :lid, s.score, s.correct, s.total > 0 AND s.correct >= s.total, NOW()
+        FROM ({_recompute_select(':uid', ':lid')}) s
+        ON CONFLICT (user_id, lesson_id) DO UPDATE SET
+            score = EXCLUDED.score,
+            correct_count = EXCLUDED.correct_count,
+            completed = EXCLUDED.completed,
+            last_update = NOW()
+        RETURNING completed
+    """), {"uid": user_id, "lid": lesson_id}).scalar()
+
+
+def recompute_progress(conn, lesson_id=None):
+    """
+    Mode penuh untuk banyak baris sekaligus: menghitung ulang semua baris progress
+    milik satu pelajaran (atau seluruh tabel jika lesson_id None) dalam satu UPDATE.
+    Dipakai setelah admin menambah/menghapus soal dan oleh perintah repair.
+    Mengembalikan jumlah baris yang diperbarui.
+    """
+    where = "AND p.lesson_id = :lid" if lesson_id is not None else ""
+    return conn.execute(text(f"""
+        UPDATE progress p SET
+            score = s.score,
+            correct_count = s.correct,
+            completed = s.total > 0 AND s.correct >= s.total,
+            last_update = NOW()
+        FROM progress p2
+        CROSS JOIN LATERAL ({_recompute_select('p2.user_id', 'p2.lesson_id')}) s
+        WHERE p.id = p2.id {where}
+    """), {"lid": lesson_id}).rowcount
+
+
+def verify_lesson_progress(conn, user_id, lesson_id):
+    """
+    Membandingkan baris progress yang tersimpan dengan hasil hitung ulang tanpa menulis apa pun.
+    Mengembalikan None jika cocok, atau dict berisi nilai tersimpan dan nilai seharusnya.
+    """
+    expected = conn.execute(
+        text(_recompute_select(':uid', ':lid')), {"uid": user_id, "lid": lesson_id}
+    ).mappings().first()
+    stored = conn.execute(text("""
+        SELECT score, correct_count, completed FROM progress
+        WHERE user_id = :uid AND lesson_id = :lid
+    """), {"uid": user_id, "lid": lesson_id}).mappings().first()
+
+    expected_completed = expected['total'] > 0 and expected['correct'] >= expected['total']
+    stored_values = (
+        (stored['score'] or 0, stored['correct_count'] or 0, bool(stored['completed']))
+        if stored else (0, 0, False)
+    )
+
+    if stored_values == (expected['score'], expected['correct'], expected_completed):
+        return None
+
+    return {
+        'user_id': user_id,
+        'lesson_id': lesson_id,
+        'stored': stored_values,
+        'expected': (expected['score'], expected['correct'], expected_completed)
+    }
+
+
+def progress_summary(conn, user_id):
+    """
+    Ringkasan progres user per pelajaran untuk halaman profil.
+    Skor maksimal diambil dari lesson_stats (sudah teragregasi per pelajaran untuk
+    soal isian dan pilihan ganda), sama dengan sumber angka di /modules, sehingga
+    biaya query sebanding dengan jumlah pelajaran, bukan jumlah soal.
+    """
+    return conn.execute(text("""
+        SELECT
+            m.title AS module_title,
+            l.title AS lesson_title,
+            l.id AS lesson_id,
+            p.score,
+            COALESCE(ls.max_score, 0) AS max_score,
+            p.completed
+        FROM modules m
+        JOIN lessons l ON l.module_id = m.id AND NOT l.deleting
+        LEFT JOIN lesson_stats ls ON ls.lesson_id = l.id
+        LEFT JOIN progress p ON p.lesson_id = l.id AND p.user_id = :uid
+        ORDER BY m.id, l.id
+    """), {"uid": user_id}).mappings().all()
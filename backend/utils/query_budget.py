@@ -0,0 +1,41 @@
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ---------------------------------------------
+# PENJAGA JUMLAH QUERY PER REQUEST
+# ---------------------------------------------
+# Menghitung statement SQL yang dijalankan selama satu request. Request di blueprint
+# yang dipantau dan melebihi QUERY_BUDGET dicatat di log (atau ditolak dengan error
+# jika QUERY_BUDGET_STRICT aktif, berguna untuk test dan development) agar pola N+1
+# cepat ketahuan.
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+def init_query_budget(app):
+    """Memasang penghitung query jika app.config['QUERY_BUDGET'] diisi."""
+    budget = app.config.get('QUERY_BUDGET')
+    if not budget:
+        return
+
+    blueprints = set(app.config.get('QUERY_BUDGET_BLUEPRINTS', ('profile', 'auth', 'admin')))
+    strict = app.config.get('QUERY_BUDGET_STRICT', False)
+
+    if not event.contains(Engine, 'before_cursor_execute', _count_query):
+        event.listen(Engine, 'before_cursor_execute', _count_query)
+
+    @app.after_request
+    def check_query_budget(response):
+        count = g.get('query_count', 0)
+        response.headers['X-Query-Count'] = str(count)
+
+        if request.blueprint in blueprints and count > budget:
+            message = f"⚠️ {request.endpoint} menjalankan {count} query (batas {budget})"
+            if strict:
+                raise RuntimeError(message)
+            app.logger.warning(message)
+        return response
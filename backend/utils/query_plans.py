@@ -0,0 +1,212 @@
+from sqlalchemy import func, select, text
+from backend.routes.main import MODULES_SQL, MODULE_SQL, MODULE_LESSONS_SQL
+from backend.routes.admin import USER_SORTS, USER_SEARCH_FILTER, USERS_PER_PAGE, users_page_sql, inbox_query, unread_query
+from backend.utils.deletion import CHUNK_DELETES
+from backend.utils.lessons import LESSON_DETAIL_SQL, LESSON_ANSWER_STATE_SQL, answer_keys_sql
+
+# ---------------------------------------------
+# PEMERIKSAAN INDEX UNTUK QUERY UTAMA
+# ---------------------------------------------
+# Query yang diperiksa diambil dari konstanta/fungsi yang sama dengan yang dipakai routes
+# (bukan salinan), jadi perubahan query di route ikut diperiksa. Pemeriksaan berjalan di
+# satu transaksi yang selalu di-rollback: data contoh berukuran realistis diisi dulu
+# (seed_plan_data, kecuali --no-seed untuk salinan produksi), tabel di-ANALYZE, lalu
+# setiap query di-EXPLAIN dengan enable_seqscan = off. Planner tetap memilih Seq Scan
+# hanya jika memang tidak ada index yang bisa dipakai.
+
+# Ukuran data contoh per user / per pelajaran (jumlah user diatur lewat --users)
+PLAN_MODULES = 50
+PLAN_LESSONS_PER_MODULE = 20
+PLAN_QUESTIONS_PER_LESSON = 10
+PLAN_ROWS_PER_USER = 20  # progress, jawaban isian, dan jawaban pilihan ganda per user
+
+# Kursor contoh per urutan daftar user (after_key sesuai tipe kolom kunci)
+_CURSORS = {
+    'id': {'after_id': 1},
+    'email': {'after_id': 1, 'after_key': 'plan-'},
+    'progress': {'after_id': 1, 'after_key': 1},
+}
+
+
+def _hot_queries():
+    """
+    {nama: (sql, parameter_tambahan, tabel_yang_memang_dibaca_penuh)}.
+    Tabel di set terakhir dibaca seluruhnya secara sengaja (mis. daftar semua modul,
+    urut berdasarkan progres, atau pencarian ILIKE '%...%').
+    """
+    queries = {
+        'lesson_detail': (LESSON_DETAIL_SQL, {}, set()),
+        'lesson_answer_state': (LESSON_ANSWER_STATE_SQL, {}, set()),
+        'answer_keys_by_lesson': (answer_keys_sql(), {}, set()),
+        'answer_keys_by_short_question': (answer_keys_sql('short'), {}, set()),
+        'answer_keys_by_mcq_question': (answer_keys_sql('mcq'), {}, set()),
+        'modules': (MODULES_SQL, {}, {'modules', 'module_stats'}),
+        'module': (MODULE_SQL, {}, set()),
+        'module_lessons': (MODULE_LESSONS_SQL, {}, set()),
+        # Cascade FOREIGN KEY saat soal dihapus satu per satu (tidak ada SQL di route)
+        'question_answers': ("SELECT id FROM user_answers WHERE question_id = :qid", {}, set()),
+        'mcq_answers': ("SELECT id FROM multiple_choice_answers WHERE question_id = :qid", {}, set()),
+        'contact_inbox': (_orm_sql(inbox_query().statement), {}, {'contact_message'}),
+        'contact_unread_count': (_orm_sql(select(func.count()).select_from(unread_query().subquery())), {}, set()),
+    }
+
+    for sort, (_, after_condition) in USER_SORTS.items():
+        # Urut berdasarkan progres menghitung semua user (lihat users_progress_list)
+        full = {'users', 'progress'} if sort == 'progress' else set()
+        limit = {'limit': USERS_PER_PAGE + 1}
+        queries[f'users_by_{sort}'] = (users_page_sql(sort, []), limit, full)
+        queries[f'users_by_{sort}_after'] = (users_page_sql(sort, [after_condition]), {**limit, **_CURSORS[sort]}, full)
+    queries['users_search'] = (
+        users_page_sql('id', [USER_SEARCH_FILTER]), {'limit': USERS_PER_PAGE + 1, 'pattern': '%plan%'}, {'users'}
+    )
+
+    for number, sql in enumerate(CHUNK_DELETES, start=1):
+        queries[f'delete_chunk_{number}'] = (sql, {'n': 1000}, set())
+    return queries
+
+
+def _orm_sql(statement):
+    return str(statement.compile(compile_kwargs={'literal_binds': True}))
+
+
+def seed_plan_data(conn, users=10000):
+    """
+    Mengisi data contoh (modul, pelajaran, soal, user, progress, jawaban, pesan kontak)
+    di transaksi `conn` lalu menjalankan ANALYZE. Pemanggil wajib me-rollback transaksinya.
+    """
+    floors = conn.execute(text("""
+        SELECT (SELECT COALESCE(MAX(id), 0) FROM users) AS users,
+               (SELECT COALESCE(MAX(id), 0) FROM lessons) AS lessons,
+               (SELECT COALESCE(MAX(id), 0) FROM questions) AS questions,
+               (SELECT COALESCE(MAX(id), 0) FROM multiple_choice_questions) AS mcqs
+    """)).mappings().one()
+    lessons = PLAN_MODULES * PLAN_LESSONS_PER_MODULE
+    questions = lessons * PLAN_QUESTIONS_PER_LESSON
+    params = {
+        'modules': PLAN_MODULES, 'per_module': PLAN_LESSONS_PER_MODULE, 'per_lesson': PLAN_QUESTIONS_PER_LESSON,
+        'users': users, 'per_user': PLAN_ROWS_PER_USER, 'lessons': lessons, 'questions': questions,
+        'user_floor': floors['users'], 'lesson_floor': floors['lessons'],
+        'question_floor': floors['questions'], 'mcq_floor': floors['mcqs'],
+    }
+
+    statements = [
+        """
+        WITH m AS (
+            INSERT INTO modules (title, description, deleting)
+            SELECT 'Plan ' || g, '', FALSE FROM generate_series(1, :modules) g
+            RETURNING id
+        )
+        INSERT INTO lessons (module_id, title, pdf_status, deleting)
+        SELECT m.id, 'Plan ' || g, 'ready', FALSE FROM m, generate_series(1, :per_module) g
+        """,
+        """
+        INSERT INTO questions (lesson_id, question, answer, points)
+        SELECT l.id, 'q', 'a', 10 FROM lessons l, generate_series(1, :per_lesson)
+        WHERE l.id > :lesson_floor
+        """,
+        """
+        INSERT INTO multiple_choice_questions
+            (lesson_id, question, option_a, option_b, option_c, option_d, correct_option, points)
+        SELECT l.id, 'q', 'a', 'b', 'c', 'd', 'A', 10 FROM lessons l, generate_series(1, :per_lesson)
+        WHERE l.id > :lesson_floor
+        """,
+        """
+        INSERT INTO users (name, email, password, is_admin)
+        SELECT 'Plan ' || g, 'plan-' || g || '@example.invalid', '-', FALSE
+        FROM generate_series(1, :users) g
+        """,
+        # Baris per user disebar ke pelajaran/soal berbeda (pengali prima, tanpa duplikat)
+        """
+        INSERT INTO progress (user_id, lesson_id, score, correct_count, completed, last_update)
+        SELECT u.id, l.id, 10, 1, (u.rn + k) % 3 = 0, now()
+        FROM (SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn FROM users WHERE id > :user_floor) u
+        CROSS JOIN generate_series(0, :per_user - 1) k
+        JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn FROM lessons WHERE id > :lesson_floor) l
+          ON l.rn = (u.rn * 7 + k * 53) % :lessons
+        """,
+        """
+        INSERT INTO user_answers (user_id, question_id, answered_at)
+        SELECT u.id, q.id, now()
+        FROM (SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn FROM users WHERE id > :user_floor) u
+        CROSS JOIN generate_series(0, :per_user - 1) k
+        JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn FROM questions WHERE id > :question_floor) q
+          ON q.rn = (u.rn * 13 + k * 97) % :questions
+        """,
+        """
+        INSERT INTO multiple_choice_answers (user_id, question_id, user_choice, is_correct, answered_at)
+        SELECT u.id, q.id, 'A', TRUE, now()
+        FROM (SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn FROM users WHERE id > :user_floor) u
+        CROSS JOIN generate_series(0, :per_user - 1) k
+        JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn FROM multiple_choice_questions
+              WHERE id > :mcq_floor) q
+          ON q.rn = (u.rn * 13 + k * 97) % :questions
+        """,
+        """
+        INSERT INTO contact_message (name, email, subject, message, timestamp, is_read)
+        SELECT 'Plan', 'plan@example.invalid', 's', 'm', now() - g * interval '1 minute', g % 5 <> 0
+        FROM generate_series(1, :users / 2) g
+        """,
+    ]
+    for sql in statements:
+        conn.execute(text(sql), params)
+    conn.execute(text(
+        "ANALYZE modules, lessons, questions, multiple_choice_questions, users, progress, "
+        "user_answers, multiple_choice_answers, contact_message"
+    ))
+
+
+def _sample_params(conn):
+    """Id contoh (baris terbaru) untuk parameter query."""
+    row = conn.execute(text("""
+        SELECT COALESCE((SELECT MAX(id) FROM lessons), 1) AS lid,
+               COALESCE((SELECT MAX(id) FROM modules), 1) AS mid,
+               COALESCE((SELECT MAX(id) FROM users), 1) AS uid,
+               COALESCE((SELECT MAX(id) FROM questions), 1) AS qid
+    """)).mappings().one()
+    return {**row, 'id': row['mid']}
+
+
+def _full_scans(plan, allowed, under_limit=False):
+    """
+    Mengumpulkan nama tabel yang dibaca seluruhnya dari plan EXPLAIN (FORMAT JSON):
+    Seq Scan, atau Index Scan tanpa Index Cond (misalnya memindai primary key hanya
+    untuk ORDER BY id lalu menyaring baris satu per satu). Index Scan tepat di bawah
+    LIMIT (halaman pertama keyset, boleh lewat Incremental Sort) berhenti lebih awal,
+    jadi tidak dihitung.
+    Tabel di `allowed` dilewati.
+    """
+    found = []
+    node_type = plan.get('Node Type')
+    table = plan.get('Relation Name')
+    if node_type == 'Seq Scan':
+        full = True
+    elif node_type in ('Index Scan', 'Index Only Scan') and 'Index Cond' not in plan:
+        full = not under_limit
+    else:
+        full = False
+    if full and table not in allowed:
+        found.append(table)
+    for child in plan.get('Plans', []):
+        streaming = node_type == 'Limit' or (under_limit and node_type == 'Incremental Sort')
+        found.extend(_full_scans(child, allowed, streaming))
+    return found
+
+
+def find_full_scans(conn, seed=True, users=10000):
+    """
+    Menjalankan EXPLAIN untuk setiap query utama (setelah seed_plan_data jika `seed`).
+    Mengembalikan dict {nama_query: [tabel, ...]} untuk query yang masih memindai seluruh tabel.
+    `conn` harus berada di transaksi yang nanti di-rollback.
+    """
+    if seed:
+        seed_plan_data(conn, users)
+    params = _sample_params(conn)
+
+    failures = {}
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    for name, (sql, extra, allowed) in _hot_queries().items():
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), {**params, **extra}).scalar()
+        tables = _full_scans(plan[0]['Plan'], allowed)
+        if tables:
+            failures[name] = tables
+    return failures
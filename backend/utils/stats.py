@@ -0,0 +1,58 @@
+from sqlalchemy import text
+
+# ---------------------------------------------
+# LESSON_STATS & MODULE_STATS
+# ---------------------------------------------
+# Jumlah soal dan skor maksimal disimpan terpisah agar halaman katalog (/modules,
+# /modules/<id>) tidak perlu menjumlahkan tabel soal setiap kali dibuka.
+# Semua fungsi di sini dipanggil oleh admin routes setelah konten berubah.
+# `conn` boleh berupa Connection (db.engine.begin()) atau db.session.
+
+
+def refresh_lesson_stats(conn, lesson_id):
+    """
+    Menghitung ulang jumlah soal dan skor maksimal satu pelajaran ke tabel lesson_stats,
+    lalu memperbarui module_stats milik modul pelajaran tersebut.
+    """
+    conn.execute(text("""
+        INSERT INTO lesson_stats (lesson_id, question_count, mcq_count, max_score)
+        SELECT
+            l.id,
+            (SELECT COUNT(*) FROM questions WHERE lesson_id = l.id),
+            (SELECT COUNT(*) FROM multiple_choice_questions WHERE lesson_id = l.id),
+            COALESCE((SELECT SUM(points) FROM questions WHERE lesson_id = l.id), 0) +
+            COALESCE((SELECT SUM(points) FROM multiple_choice_questions WHERE lesson_id = l.id), 0)
+        FROM lessons l
+        WHERE l.id = :lid
+        ON CONFLICT (lesson_id) DO UPDATE SET
+            question_count = EXCLUDED.question_count,
+            mcq_count = EXCLUDED.mcq_count,
+            max_score = EXCLUDED.max_score
+    """), {"lid": lesson_id})
+
+    module_id = conn.execute(
+        text("SELECT module_id FROM lessons WHERE id = :lid"), {"lid": lesson_id}
+    ).scalar()
+    if module_id is not None:
+        refresh_module_stats(conn, module_id)
+
+
+def refresh_module_stats(conn, module_id):
+    """Menjumlahkan lesson_stats milik satu modul ke tabel module_stats."""
+    conn.execute(text("""
+        INSERT INTO module_stats (module_id, lesson_count, question_count, max_score)
+        SELECT
+            m.id,
+            COUNT(l.id),
+            COALESCE(SUM(ls.question_count + ls.mcq_count), 0),
+            COALESCE(SUM(ls.max_score), 0)
+        FROM modules m
+        LEFT JOIN lessons l ON l.module_id = m.id AND NOT l.deleting
+        LEFT JOIN lesson_stats ls ON ls.lesson_id = l.id
+        WHERE m.id = :mid
+        GROUP BY m.id
+        ON CONFLICT (module_id) DO UPDATE SET
+            lesson_count = EXCLUDED.lesson_count,
+            question_count = EXCLUDED.question_count,
+            max_score = EXCLUDED.max_score
+    """), {"mid": module_id})
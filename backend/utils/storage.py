@@ -0,0 +1,75 @@
+import hashlib
+import os
+import re
+from flask import url_for
+from backend.utils.jobs import enqueue_upload
+
+# ---------------------------------------------
+# PENYIMPANAN PDF PELAJARAN (PLUGGABLE)
+# ---------------------------------------------
+# PDF_STORAGE=drive (default) : PDF diunggah ke Google Drive oleh upload job (utils/jobs.py).
+# PDF_STORAGE=local           : PDF disimpan di UPLOAD_FOLDER/pdf berdasarkan hash SHA-256
+#                               isinya dan disajikan oleh main.lesson_pdf (sendfile, Range,
+#                               ETag, cache 1 tahun). Upload yang isinya sama hanya disimpan sekali.
+# Mode local membutuhkan UPLOAD_FOLDER di disk persisten (bukan filesystem sementara).
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+_READ_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LocalStorage:
+    """PDF content-addressed di disk lokal: UPLOAD_FOLDER/pdf/<2 huruf pertama>/<sha256>.pdf."""
+
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = os.path.join(root, 'pdf')
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}.pdf")
+
+    def store(self, session, lesson, staged_path, filename, digest=None):
+        digest = digest or file_sha256(staged_path)
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            # Isi yang sama sudah pernah diupload: pakai file lama
+            os.remove(staged_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(staged_path, path)
+
+        lesson.pdf_url = url_for('main.lesson_pdf', digest=digest)
+        lesson.pdf_status = 'ready'
+
+
+class DriveStorage:
+    """PDF di Google Drive, diunggah di latar belakang oleh upload job."""
+
+    name = 'drive'
+
+    def store(self, session, lesson, staged_path, filename, digest=None):
+        lesson.pdf_url = None
+        lesson.pdf_status = 'pending'
+        enqueue_upload(session, lesson.id, staged_path, filename)
+
+
+def init_storage(app):
+    """Memilih backend penyimpanan PDF dari app.config['PDF_STORAGE'] (app.extensions['pdf_storage'])."""
+    kind = app.config.get('PDF_STORAGE', 'drive')
+    if kind == 'local':
+        storage = LocalStorage(app.config['UPLOAD_FOLDER'])
+    elif kind == 'drive':
+        storage = DriveStorage()
+    else:
+        raise ValueError(f"PDF_STORAGE tidak dikenal: {kind}")
+    app.extensions['pdf_storage'] = storage
+    return storage
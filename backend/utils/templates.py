@@ -0,0 +1,43 @@
+import os
+import time
+from jinja2 import FileSystemBytecodeCache
+
+# ---------------------------------------------
+# BYTECODE CACHE TEMPLATE JINJA
+# ---------------------------------------------
+# Tanpa cache, setiap worker gunicorn mengompilasi template (parse -> kode Python) saat
+# template itu pertama kali dirender. Dengan TEMPLATE_CACHE_DIR, hasil kompilasi disimpan
+# di disk dan dipakai ulang oleh semua worker; `flask templates precompile` mengisinya
+# saat build/deploy. Cache dicocokkan dengan checksum isi template, jadi template yang
+# berubah otomatis dikompilasi ulang. TEMPLATES_PRELOAD=1 memuat semua template saat
+# worker start sehingga request pertama tidak perlu membaca file template sama sekali.
+
+
+def page_templates(app):
+    """Nama semua template halaman (HTML) yang bisa dimuat oleh app."""
+    return sorted(name for name in app.jinja_env.list_templates() if name.endswith('.html'))
+
+
+def load_templates(app):
+    """Memuat (dan mengompilasi jika perlu) semua template. Mengembalikan {nama: ms}."""
+    timings = {}
+    for name in page_templates(app):
+        started = time.perf_counter()
+        app.jinja_env.get_template(name)
+        timings[name] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def init_template_cache(app):
+    """Memasang FileSystemBytecodeCache di Jinja app dan (opsional) memuat semua template."""
+    path = app.config.get('TEMPLATE_CACHE_DIR')
+    if path:
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            app.logger.warning("Folder cache template %s tidak bisa dibuat: %s", path, e)
+        else:
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(path)
+
+    if app.config.get('TEMPLATES_PRELOAD'):
+        load_templates(app)
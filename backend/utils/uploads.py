@@ -0,0 +1,84 @@
+import hashlib
+import os
+import tempfile
+from flask import Request, current_app
+
+# ---------------------------------------------
+# FILE UPLOAD LANGSUNG KE FOLDER STAGING
+# ---------------------------------------------
+# Secara default Werkzeug menulis file multipart ke file sementara sistem, lalu
+# route menyalinnya lagi dengan FileStorage.save(). Untuk endpoint di STAGED_UPLOAD_ENDPOINTS,
+# body request dialirkan per potongan langsung ke UPLOAD_FOLDER/jobs sehingga file
+# hanya ditulis sekali dan tidak pernah dimuat utuh ke memori. SHA-256 isinya dihitung
+# sambil ditulis (dipakai penyimpanan lokal content-addressed tanpa membaca ulang file).
+# File yang tidak diambil route (validasi gagal, exception) dihapus saat request ditutup.
+
+STAGED_UPLOAD_ENDPOINTS = {'admin.add_lesson'}
+
+
+def staging_dir():
+    path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'jobs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class _HashingFile:
+    """Membungkus file staging: setiap write() juga memperbarui hash SHA-256."""
+
+    def __init__(self, f):
+        self._file = f
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class StagedUploadRequest(Request):
+    """Request class Flask yang menulis file upload endpoint tertentu langsung ke folder staging."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if filename and self.endpoint in STAGED_UPLOAD_ENDPOINTS:
+            stream = tempfile.NamedTemporaryFile('wb+', dir=staging_dir(), suffix='.upload', delete=False)
+            self.__dict__.setdefault('_staged_paths', set()).add(stream.name)
+            return _HashingFile(stream)
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+    def close(self):
+        super().close()
+        for path in self.__dict__.pop('_staged_paths', ()):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def claim_staged_file(request, file_storage, suffix=''):
+    """
+    Mengambil alih file upload yang sudah ada di folder staging (tidak akan dihapus saat
+    request selesai). Mengembalikan path file. Jika file tidak di-staging (endpoint lain),
+    isinya disalin ke folder staging.
+    """
+    staged = request.__dict__.get('_staged_paths', set())
+    path = getattr(file_storage.stream, 'name', None)
+
+    if path in staged:
+        file_storage.stream.close()
+        staged.discard(path)
+        final_path = os.path.splitext(path)[0] + suffix
+        os.replace(path, final_path)
+        return final_path
+
+    fd, final_path = tempfile.mkstemp(dir=staging_dir(), suffix=suffix)
+    with os.fdopen(fd, 'wb') as f:
+        file_storage.save(f)
+    return final_path
+
+
+def staged_sha256(file_storage):
+    """SHA-256 (hex) file upload yang di-staging, atau None jika tidak dihitung."""
+    stream = file_storage.stream
+    return stream.sha256.hexdigest() if isinstance(stream, _HashingFile) else None
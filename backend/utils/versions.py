@@ -0,0 +1,116 @@
+import threading
+import time
+from flask import current_app, g
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from backend.models import db
+
+# ---------------------------------------------
+# VERSI DATA (UNTUK ETAG HALAMAN)
+# ---------------------------------------------
+# Versi konten  : baris 'content' di tabel content_versions, dinaikkan oleh
+#                 invalidate_lesson() (dan admin routes lain) setiap konten berubah.
+#                 Disimpan di database agar sama untuk semua worker gunicorn.
+# Versi progres : MAX(progress.last_update) milik user; berubah setiap kali user
+#                 menjawab soal (apply_progress_delta / recompute selalu mengisi NOW()).
+#
+# Jalur panas (check_answer, submit_mcq_answer) tidak membaca versi konten dari database
+# di setiap request: setiap proses mengingat versi terakhir yang diketahuinya selama
+# CONTENT_VERSION_TTL detik. Perubahan admin di worker lain terlihat paling lambat setelah
+# TTL itu; worker yang melakukan perubahan dan halaman dengan ETag selalu memakai versi
+# terbaru (ETag membaca versi dari database di setiap request).
+
+CONTENT = 'content'
+CONTENT_VERSION_TTL = 1.0
+
+# Dipakai di dalam query lain, agar versi konten ikut terbaca tanpa round trip tambahan
+CONTENT_VERSION_SQL = f"(SELECT version FROM content_versions WHERE name = '{CONTENT}')"
+
+_known = {'version': None, 'read_at': 0.0}
+_known_lock = threading.Lock()
+
+
+def _ttl():
+    return current_app.config.get('CONTENT_VERSION_TTL', CONTENT_VERSION_TTL)
+
+
+def remember_content_version(version):
+    """Mencatat versi konten yang baru dibaca dari database (untuk request ini dan proses ini)."""
+    if version is None:
+        return
+    now = time.monotonic()
+    with _known_lock:
+        # Versi hanya naik; hasil baca lama yang selesai belakangan tidak menimpa versi baru
+        if _known['version'] is None or version >= _known['version'] or now - _known['read_at'] >= _ttl():
+            _known['version'] = version
+            _known['read_at'] = now
+    g.content_version = version
+
+
+def bump_content_version(name=CONTENT):
+    """Menaikkan versi konten (dipanggil setelah commit perubahan konten)."""
+    try:
+        # Lewat db.session: request admin tetap memakai satu koneksi (perubahan sudah di-commit)
+        version = db.session.execute(text("""
+            INSERT INTO content_versions (name, version, updated_at)
+            VALUES (:name, 1, now() AT TIME ZONE 'utc')
+            ON CONFLICT (name) DO UPDATE SET
+                version = content_versions.version + 1,
+                updated_at = EXCLUDED.updated_at
+            RETURNING version
+        """), {"name": name}).scalar()
+        db.session.commit()
+        if name == CONTENT:
+            remember_content_version(version)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        # Konten sudah ter-commit; paling buruk ETag lama masih dianggap valid sampai bump berikutnya
+        current_app.logger.error("Gagal menaikkan versi konten: %s", e)
+
+
+def data_versions(conn, user_id):
+    """
+    Versi konten dan versi progres user dalam satu query.
+    Mengembalikan (content_version, progress_version); progress_version None jika
+    user belum pernah menjawab.
+    """
+    row = conn.execute(text("""
+        SELECT
+            (SELECT version FROM content_versions WHERE name = :name) AS content,
+            (SELECT MAX(last_update) FROM progress WHERE user_id = :uid) AS progress
+    """), {"name": CONTENT, "uid": user_id}).first()
+    return row.content, row.progress
+
+
+def known_content_version():
+    """Versi konten yang sudah diketahui tanpa query (dari g atau ingatan proses), atau None."""
+    if 'content_version' in g:
+        return g.content_version
+    with _known_lock:
+        version, read_at = _known['version'], _known['read_at']
+    if version is not None and time.monotonic() - read_at < _ttl():
+        g.content_version = version
+        return version
+    return None
+
+
+def current_content_version(conn=None):
+    """
+    Versi konten untuk request ini (tetap sama selama request, disimpan di g).
+    Query hanya dijalankan jika versi yang diingat proses sudah lebih tua dari
+    CONTENT_VERSION_TTL, memakai `conn` atau koneksi milik db.session request ini (tidak
+    pernah mengambil koneksi kedua dari pool).
+    """
+    version = known_content_version()
+    if version is not None:
+        return version
+    try:
+        if conn is None:
+            conn = db.session.connection()
+        version = conn.execute(text(f"SELECT {CONTENT_VERSION_SQL}")).scalar()
+    except SQLAlchemyError as e:
+        current_app.logger.warning("Versi konten tidak bisa dibaca: %s", e)
+        g.content_version = None
+        return None
+    remember_content_version(version)
+    return version
@@ -0,0 +1,119 @@
+import math
+import os
+
+# ---------------------------------------------
+# PROFIL DEPLOY GUNICORN
+# ---------------------------------------------
+# Dibaca otomatis oleh `gunicorn backend.app:app` dari folder kerja. Dua kelas worker
+# yang didukung (GUNICORN_WORKER_CLASS):
+#   gthread (default) : beberapa proses x thread. Query DB dan I/O lain melepas GIL,
+#                       sehingga satu request yang menunggu tidak memblokir seluruh proses.
+#   gevent            : beberapa proses x banyak greenlet. psycopg2 dibuat kooperatif
+#                       dengan psycogreen (lihat post_fork). Butuh paket gevent + psycogreen.
+# Jumlah worker/thread diturunkan dari jumlah CPU (termasuk kuota CPU cgroup container),
+# dan ukuran pool koneksi DB (DB_POOL_SIZE / DB_MAX_OVERFLOW, lihat backend/utils/db_pool.py)
+# disesuaikan dengan jumlah request bersamaan per worker, kecuali sudah diatur manual
+# lewat environment.
+# Semua angka bisa ditimpa: WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_WORKER_CONNECTIONS.
+
+
+# Batas default jumlah worker jika WEB_CONCURRENCY tidak diisi: setiap worker
+# membuka pool koneksi DB sendiri, dan host besar tidak berarti Postgres sanggup menampungnya.
+MAX_DEFAULT_WORKERS = 4
+
+
+def _cgroup_cpu_quota():
+    """Kuota CPU container (cgroup v2 cpu.max atau v1 cfs_quota/cfs_period), None jika tidak dibatasi."""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota == 'max':
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def _cpu_count():
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    # sched_getaffinity melihat semua CPU host; container dengan kuota hanya boleh memakai sebagian
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+cpus = _cpu_count()
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class not in ('gthread', 'gevent'):
+    raise RuntimeError(f"GUNICORN_WORKER_CLASS tidak didukung: {worker_class} (pilih gthread atau gevent)")
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+if worker_class == 'gevent':
+    # Satu proses per CPU (+1 cadangan), konkurensi dari greenlet
+    workers = _env_int('WEB_CONCURRENCY', min(cpus + 1, MAX_DEFAULT_WORKERS))
+    worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 200)
+    # Greenlet yang menunggu koneksi DB mengantre di pool (DB_POOL_TIMEOUT), bukan membuka koneksi baru
+    os.environ.setdefault('DB_POOL_SIZE', '10')
+    os.environ.setdefault('DB_MAX_OVERFLOW', '10')
+else:
+    workers = _env_int('WEB_CONCURRENCY', min(cpus * 2 + 1, MAX_DEFAULT_WORKERS))
+    threads = _env_int('GUNICORN_THREADS', 4)
+    # Setiap thread bisa memegang satu koneksi; overflow untuk dispatcher upload job
+    os.environ.setdefault('DB_POOL_SIZE', str(threads))
+    os.environ.setdefault('DB_MAX_OVERFLOW', '2')
+
+# Upload PDF dialirkan ke disk per potongan, jadi 60 detik cukup untuk request terlama
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = 30
+keepalive = 5
+
+# Worker didaur ulang secara bertahap untuk membatasi pertumbuhan memori
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = max_requests // 10
+
+# Aplikasi dimuat di setiap worker, bukan di master: create_app() membuka koneksi DB
+# (cek versi skema) dan koneksi itu tidak boleh ikut diwariskan ke proses hasil fork.
+preload_app = False
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        # Tanpa ini psycopg2 memblokir seluruh proses selama query berjalan
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+
+def when_ready(server):
+    pool_size = int(os.environ['DB_POOL_SIZE'])
+    max_overflow = int(os.environ['DB_MAX_OVERFLOW'])
+    server.log.info(
+        "Profil %s: %s worker x %s (CPU: %s, DB_POOL_SIZE=%s, DB_MAX_OVERFLOW=%s)",
+        worker_class, workers,
+        f"{worker_connections} koneksi" if worker_class == 'gevent' else f"{threads} thread",
+        cpus, pool_size, max_overflow,
+    )
+    # Bandingkan dengan max_connections Postgres (dikurangi koneksi release/CLI/admin)
+    server.log.info(
+        "Koneksi DB maksimum: %s worker x (%s pool + %s overflow) = %s",
+        workers, pool_size, max_overflow, workers * (pool_size + max_overflow),
+    )